@@ -2,7 +2,7 @@ from django.contrib import admin, messages
 from django.contrib.auth import get_permission_codename
 from django.db import transaction
 from django.forms.widgets import Media, MediaAsset, Script
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as t
 
@@ -23,10 +23,7 @@ def rerun(modeladmin, request, queryset):
             request,
             f"Only failed tasks can be retried. {succeeded} tasks have been skipped",
         )
-    counter = 0
-    for obj in queryset.not_succeeded().iterator():
-        obj.enqueue()
-        counter += 1
+    counter = queryset.not_succeeded().enqueue()
     messages.success(request, f"{counter} tasks have been successfully queued")
 
 
@@ -59,7 +56,9 @@ class TaskAdmin(VersionAdmin):
 
     @admin.display(description=t("Traceback"))
     def pretty_stacktrace(self, obj):
-        return format_html('<pre class="readonly collapse">{}<pre>', obj.stacktrace)
+        return format_html(
+            '<pre class="readonly collapse">{}<pre>', obj.get_stacktrace()
+        )
 
     @admin.display(description=t("Child tasks"))
     def child_tasks(self, obj):
@@ -157,6 +156,7 @@ class WorkflowAdmin(VersionAdmin):
     def get_readonly_fields(self, *args, **kwargs):
         return [
             "display_workflow_diagram",
+            "display_task_summary",
             *super().get_readonly_fields(*args, **kwargs),
             "modified",
             "created",
@@ -171,6 +171,38 @@ class WorkflowAdmin(VersionAdmin):
             )
         return ""
 
+    @admin.display(description=t("Task summary"))
+    def display_task_summary(self, obj):
+        """Display the number of tasks per node and status."""
+        if not obj.pk:
+            return ""
+        return format_html(
+            "<table><thead><tr><th>{}</th><th>{}</th><th>{}</th><th>{}</th>"
+            "<th>{}</th></tr></thead><tbody>{}</tbody></table>",
+            t("name"),
+            t("tasks"),
+            t("status"),
+            t("first"),
+            t("last"),
+            format_html_join(
+                "",
+                "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+                (
+                    (
+                        summary.name,
+                        summary.count,
+                        ", ".join(
+                            f"{status}: {count}"
+                            for status, count in sorted(summary.statuses.items())
+                        ),
+                        summary.first,
+                        summary.last,
+                    )
+                    for summary in obj.get_task_summary().values()
+                ),
+            ),
+        )
+
     @transaction.atomic()
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
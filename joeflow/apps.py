@@ -1,12 +1,31 @@
+import logging
+
 from django.apps import AppConfig
 from django.utils.translation import gettext_lazy as t
 
+logger = logging.getLogger(__name__)
+
 
 class JoeflowConfig(AppConfig):
     name = "joeflow"
     verbose_name = t("Joeflow")
 
     def ready(self):
+        from .conf import settings
         from .contrib.reversion import register_workflows
 
         register_workflows()
+        if settings.JOEFLOW_WARM_GRAPH_CACHE:
+            self.warm_graph_cache()
+
+    def warm_graph_cache(self):
+        """Render the graphs of all workflows into the cache."""
+        from .models import get_workflows
+
+        for workflow in get_workflows():
+            try:
+                workflow.get_graph_svg()
+            except Exception:  # NoQA
+                logger.warning(
+                    "Could not render the graph of %s", workflow, exc_info=True
+                )
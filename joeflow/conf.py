@@ -21,6 +21,26 @@ class JoeflowAppConfig(AppConf):
     * ``joeflow.runner.dramatiq.task_runner``
     * ``joeflow.runner.celery.task_runner``
 
+    Machine tasks can also be executed synchronously, once the transaction is
+    committed, in the same process. This is useful for tests or short chains of
+    machine tasks. To use the synchronous runner change this setting to:
+
+    * ``joeflow.runner.sync.task_runner``
+
+    Should you not want to operate a message broker, machine tasks can be executed
+    by workers that poll the database. Workers are started via the
+    ``runjoeflowworker`` management command. To use the database runner change
+    this setting to:
+
+    * ``joeflow.runner.database.task_runner``
+
+    A runner may also have a counterpart of the same name with a ``_many``
+    suffix in the same module, e.g. ``task_runner_many`` for ``task_runner``.
+    It receives a list of tasks as well as ``countdown`` and ``eta`` keyword
+    arguments and is used to publish multiple tasks at once, e.g. for parallel
+    branches. Otherwise, the runner is called once per task. The Dramatiq,
+    Celery and database runners provide one.
+
     .. _Dramatiq: https://dramatiq.io/
     .. _Celery: http://www.celeryproject.org/
     """
@@ -29,3 +49,124 @@ class JoeflowAppConfig(AppConf):
     """
     Queue name in which all machine tasks will be queued.
     """
+
+    JOEFLOW_LOCK_STRATEGY = "nowait"
+    """
+    Strategy used by task runners to lock a workflow while executing its tasks.
+
+    Choose one of ``nowait``, ``blocking``, ``skip_locked`` or ``advisory``.
+    The strategy can be overridden per workflow via
+    :attr:`.Workflow.lock_strategy`, see :mod:`joeflow.runner.locking`.
+    """
+
+    JOEFLOW_LOCK_TIMEOUT = 5
+    """
+    Seconds the ``blocking`` lock strategy waits for a workflow lock.
+    """
+
+    JOEFLOW_LOCK_RETRY_DELAY = 1
+    """
+    Seconds after which a task is retried, if the ``skip_locked`` lock strategy
+    skipped its locked workflow.
+    """
+
+    JOEFLOW_CACHE = "default"
+    """
+    Alias of the cache used to store rendered workflow graphs.
+
+    Rendering a graph requires Graphviz' ``dot`` executable, which is called
+    in a subprocess. Instance graphs are cached until a task of the workflow
+    changes. Set to ``None`` to disable caching.
+
+    Tasks are mostly changed by worker processes. Instance graphs, as well as
+    the markers of canceled tasks, are therefore only cached, if the cache is
+    shared between processes, e.g. Redis or Memcached, but not the default
+    local memory cache.
+    """
+
+    JOEFLOW_CANCEL_MARKER_TIMEOUT = 60 * 60 * 24
+    """
+    Seconds canceled tasks are remembered in :attr:`JOEFLOW_CACHE`.
+
+    Runners check the cache before locking a task, so messages of canceled
+    tasks that are already queued are dropped without locking any rows.
+    Messages that are received later, or if the cache is not shared between
+    processes, fall back to the database.
+    """
+
+    JOEFLOW_STACKTRACE_MAX_FRAMES = None
+    """
+    Maximum number of frames stored for a failed task.
+
+    Only the innermost frames, closest to where the exception was raised, are
+    kept. Set to ``None`` to store all frames.
+    """
+
+    JOEFLOW_STACKTRACE_SHARED = False
+    """
+    Store identical stacktraces only once.
+
+    Every failed task stores a fingerprint of its stacktrace. If enabled, the
+    stacktrace itself is stored once per fingerprint in a separate table
+    instead of on every task, e.g. for failing loops that are retried often.
+    """
+
+    JOEFLOW_STACKTRACE_COMPRESS = False
+    """
+    Compress shared stacktraces with zlib, see :attr:`JOEFLOW_STACKTRACE_SHARED`.
+    """
+
+    JOEFLOW_GRAPH_ENGINE = None
+    """
+    Engine used to render workflow graphs as SVG.
+
+    ``dot`` uses Graphviz_, which needs the ``dot`` executable and renders every
+    graph in a subprocess. ``python`` uses the built-in layered layout of
+    :mod:`joeflow.layout`, which runs in-process and requires no dependencies.
+    If not set, Graphviz is used if available.
+
+    .. _Graphviz: https://graphviz.org/
+    """
+
+    JOEFLOW_INSTANCE_GRAPH_MAX_TASKS = None
+    """
+    Aggregate the instance graph of workflows with more tasks by node name.
+
+    Long-running cyclic workflows create a task per loop iteration. Instead of
+    loading every task, the graph is built from a single aggregate query. Set
+    to ``None`` to always load all tasks.
+    """
+
+    JOEFLOW_WORKFLOW_COUNTERS = False
+    """
+    Maintain denormalized task counters on every workflow.
+
+    If enabled, every task state change updates the workflow's
+    ``open_task_count``, ``failed_task_count``, ``last_activity`` and
+    ``finished`` fields in place. A workflow is finished, once it has neither
+    scheduled nor failed tasks. This allows listing workflows by state without
+    joining their tasks. Call :meth:`.Workflow.update_task_counters` after
+    enabling the setting, to count existing tasks.
+    """
+
+    JOEFLOW_WARM_GRAPH_CACHE = False
+    """
+    Render the graphs of all workflows into the cache, once the app is ready.
+    """
+
+    JOEFLOW_SYNC_MAX_DEPTH = 100
+    """
+    Maximum number of chained machine tasks the synchronous runner executes.
+
+    Tasks beyond this limit are handed to :attr:`JOEFLOW_SYNC_FALLBACK_TASK_RUNNER`.
+    This prevents loops from blocking a request forever.
+    """
+
+    JOEFLOW_SYNC_FALLBACK_TASK_RUNNER = None
+    """
+    Task runner used for tasks the synchronous runner can not execute right away.
+
+    This includes tasks that are scheduled for later, tasks that return ``False``,
+    tasks that could not be locked and tasks beyond :attr:`JOEFLOW_SYNC_MAX_DEPTH`.
+    If not set, these tasks remain scheduled and need to be rerun manually.
+    """
@@ -0,0 +1,447 @@
+"""Layered graph layout to render workflow graphs as SVG without Graphviz.
+
+The layout follows the Sugiyama method:
+
+#. cycles are broken by reversing back edges found in a depth-first search,
+#. nodes are assigned to layers by their longest path from a source,
+#. edges spanning multiple layers are split by virtual nodes,
+#. crossings are reduced by sorting layers by their neighbors' barycenter,
+#. nodes are aligned with their neighbors without overlapping each other.
+
+Everything runs in the current process. Graphs with a few hundred nodes are
+laid out within milliseconds, yet the result is less refined than Graphviz'.
+"""
+
+import collections
+import functools
+import html
+import itertools
+import shutil
+
+from .typing import HUMAN
+
+__all__ = ["Layout", "render_svg", "is_dot_available"]
+
+FONT_SIZE = 14
+CHAR_WIDTH = 8
+NODE_HEIGHT = 36
+MIN_NODE_WIDTH = 54
+NODE_PADDING = 24
+NODE_SEP = 18
+RANK_SEP = 48
+ARROW_SIZE = 8
+MARGIN = 8
+ITERATIONS = 12
+
+
+@functools.cache
+def is_dot_available():
+    """Return whether the Graphviz package and its ``dot`` executable are installed."""
+    try:
+        import graphviz  # NoQA
+    except ImportError:
+        return False
+    return shutil.which("dot") is not None
+
+
+class Layout:
+    """Position the nodes and route the edges of a directed graph.
+
+    Args:
+        nodes (list[str]): Node names, in order of their first appearance.
+        edges (list[tuple[str, str]]): Directed edges between the nodes.
+        rankdir (str): Direction of the graph, like Graphviz' ``rankdir``.
+
+    Attributes:
+        coordinates (dict): Center point of every node by name.
+        sizes (dict): Width and height of every node by name.
+        routes (list[tuple]): Edge, points of its path and whether the points
+            are the start, control and end points of a single curve.
+        width (float): Width of the graph.
+        height (float): Height of the graph.
+
+    """
+
+    def __init__(self, nodes, edges, rankdir="LR"):
+        self.nodes = list(dict.fromkeys(nodes))
+        self.edges = list(dict.fromkeys(edges))
+        for edge in self.edges:
+            self.nodes.extend(name for name in edge if name not in self.nodes)
+        self.horizontal = rankdir in ("LR", "RL")
+        self.mirrored = rankdir in ("RL", "BT")
+        self.sizes = {name: self.get_node_size(name) for name in self.nodes}
+
+        self._break_cycles()
+        self._assign_ranks()
+        self._split_long_edges()
+        self._order_layers()
+        self._assign_coordinates()
+        self._route_edges()
+
+    @staticmethod
+    def get_label(name):
+        return name.replace("_", " ")
+
+    @classmethod
+    def get_node_size(cls, name):
+        width = len(cls.get_label(name)) * CHAR_WIDTH + NODE_PADDING
+        return max(width, MIN_NODE_WIDTH), NODE_HEIGHT
+
+    def _break_cycles(self):
+        successors = collections.defaultdict(list)
+        for tail, head in self.edges:
+            if tail != head:
+                successors[tail].append(head)
+
+        self.back_edges = set()
+        visiting, visited = set(), set()
+        for root in self.nodes:
+            if root in visited:
+                continue
+            visiting.add(root)
+            stack = [(root, iter(successors[root]))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if child in visiting:
+                        self.back_edges.add((node, child))
+                    elif child not in visited:
+                        visiting.add(child)
+                        stack.append((child, iter(successors[child])))
+                        break
+                else:
+                    visiting.discard(node)
+                    visited.add(node)
+                    stack.pop()
+
+    def _get_dag_edge(self, edge):
+        return edge[::-1] if edge in self.back_edges else edge
+
+    def _assign_ranks(self):
+        successors = collections.defaultdict(list)
+        in_degree = dict.fromkeys(self.nodes, 0)
+        for edge in self.edges:
+            if edge[0] != edge[1]:
+                tail, head = self._get_dag_edge(edge)
+                successors[tail].append(head)
+                in_degree[head] += 1
+
+        self.ranks = dict.fromkeys(self.nodes, 0)
+        queue = collections.deque(n for n in self.nodes if not in_degree[n])
+        while queue:
+            node = queue.popleft()
+            for child in successors[node]:
+                self.ranks[child] = max(self.ranks[child], self.ranks[node] + 1)
+                in_degree[child] -= 1
+                if not in_degree[child]:
+                    queue.append(child)
+
+    def _split_long_edges(self):
+        layers = collections.defaultdict(list)
+        for name in self.nodes:
+            layers[self.ranks[name]].append(name)
+        self.upper = collections.defaultdict(list)
+        self.lower = collections.defaultdict(list)
+        self.chains = []
+        virtual = 0
+        for edge in self.edges:
+            if edge[0] == edge[1]:
+                self.chains.append((edge, [edge[0]]))
+                continue
+            tail, head = self._get_dag_edge(edge)
+            chain = [tail]
+            for rank in range(self.ranks[tail] + 1, self.ranks[head]):
+                # Virtual nodes are integers, node names are strings.
+                self.ranks[virtual] = rank
+                self.sizes[virtual] = (0, 0)
+                layers[rank].append(virtual)
+                chain.append(virtual)
+                virtual += 1
+            chain.append(head)
+            for start, end in itertools.pairwise(chain):
+                self.lower[start].append(end)
+                self.upper[end].append(start)
+            self.chains.append((edge, chain))
+        self.layers = [layers[rank] for rank in range(len(layers))]
+
+    def _order_layers(self):
+        best, fewest = [list(layer) for layer in self.layers], self.count_crossings()
+        for i in range(ITERATIONS):
+            if i % 2:
+                for rank in range(len(self.layers) - 2, -1, -1):
+                    self._sort_layer(rank, self.layers[rank + 1], self.lower)
+            else:
+                for rank in range(1, len(self.layers)):
+                    self._sort_layer(rank, self.layers[rank - 1], self.upper)
+            crossings = self.count_crossings()
+            if crossings < fewest:
+                best, fewest = [list(layer) for layer in self.layers], crossings
+            if not fewest:
+                break
+        self.layers = best
+
+    def _sort_layer(self, rank, fixed_layer, neighbors):
+        positions = {node: i for i, node in enumerate(fixed_layer)}
+        scale = len(fixed_layer) / max(len(self.layers[rank]), 1)
+
+        def barycenter(item):
+            i, node = item
+            if not neighbors[node]:
+                return i * scale
+            return sum(positions[n] for n in neighbors[node]) / len(neighbors[node])
+
+        self.layers[rank] = [
+            node for i, node in sorted(enumerate(self.layers[rank]), key=barycenter)
+        ]
+
+    def count_crossings(self):
+        """Return the number of edge crossings between adjacent layers."""
+        crossings = 0
+        for upper, lower in itertools.pairwise(self.layers):
+            positions = {node: i for i, node in enumerate(lower)}
+            ends = [
+                end
+                for node in upper
+                for end in sorted(positions[n] for n in self.lower[node])
+            ]
+            crossings += sum(
+                1
+                for i, end in enumerate(ends)
+                for other in ends[i + 1 :]
+                if other < end
+            )
+        return crossings
+
+    def _get_breadth(self, node):
+        width, height = self.sizes[node]
+        return height if self.horizontal else width
+
+    def _get_depth(self, node):
+        width, height = self.sizes[node]
+        return width if self.horizontal else height
+
+    def _assign_coordinates(self):
+        breadth = self._get_breadth
+        offsets = {}
+        for layer in self.layers:
+            offset = 0
+            for node in layer:
+                offsets[node] = offset + breadth(node) / 2
+                offset += breadth(node) + NODE_SEP
+
+        for i in range(ITERATIONS):
+            if i % 2:
+                layers, neighbors = reversed(self.layers), self.lower
+            else:
+                layers, neighbors = self.layers, self.upper
+            for layer in layers:
+                desired = [
+                    sum(offsets[n] for n in neighbors[node]) / len(neighbors[node])
+                    if neighbors[node]
+                    else offsets[node]
+                    for node in layer
+                ]
+                self._place_layer(layer, desired, offsets)
+
+        low = min((offsets[n] - breadth(n) / 2 for n in offsets), default=0)
+        high = max((offsets[n] + breadth(n) / 2 for n in offsets), default=0)
+
+        depths = []
+        position = MARGIN
+        for layer in self.layers:
+            depth = max(map(self._get_depth, layer), default=0)
+            depths.append(position + depth / 2)
+            position += depth + RANK_SEP
+        total_depth = position - RANK_SEP + MARGIN
+        # Leave room for back edges and loops, that are drawn on the outer side.
+        if self.back_edges or any(tail == head for tail, head in self.edges):
+            low -= RANK_SEP / 2
+        total_breadth = high - low + 2 * MARGIN
+
+        self.coordinates = {}
+        for node, offset in offsets.items():
+            depth = depths[self.ranks[node]]
+            if self.mirrored:
+                depth = total_depth - depth
+            offset = offset - low + MARGIN
+            self.coordinates[node] = (
+                (depth, offset) if self.horizontal else (offset, depth)
+            )
+        if self.horizontal:
+            self.width, self.height = max(total_depth, 0), total_breadth
+        else:
+            self.width, self.height = total_breadth, max(total_depth, 0)
+
+    def _place_layer(self, layer, desired, offsets):
+        """Move nodes towards their desired offset, keeping order and distance."""
+        breadth = self._get_breadth
+        forward, end = [], float("-inf")
+        for node, offset in zip(layer, desired, strict=True):
+            offset = max(offset, end + breadth(node) / 2)
+            forward.append(offset)
+            end = offset + breadth(node) / 2 + NODE_SEP
+        backward, start = [], float("inf")
+        for node, offset in zip(reversed(layer), reversed(desired), strict=True):
+            offset = min(offset, start - breadth(node) / 2)
+            backward.append(offset)
+            start = offset - breadth(node) / 2 - NODE_SEP
+        for node, a, b in zip(layer, forward, reversed(backward), strict=True):
+            offsets[node] = (a + b) / 2
+
+    def _get_port(self, node, direction):
+        """Return the point where an edge leaves or enters a node."""
+        x, y = self.coordinates[node]
+        depth = self._get_depth(node) / 2 * direction
+        return (x + depth, y) if self.horizontal else (x, y + depth)
+
+    def _get_side_port(self, node, shift=0):
+        """Return a point on the outer side of a node, across the rank direction."""
+        x, y = self.coordinates[node]
+        breadth = self._get_breadth(node) / 2
+        return (x + shift, y - breadth) if self.horizontal else (x - breadth, y + shift)
+
+    def _bend(self, point, distance=RANK_SEP / 2):
+        x, y = point
+        return (x, y - distance) if self.horizontal else (x - distance, y)
+
+    def _route_edges(self):
+        """Route edges through their virtual nodes.
+
+        Back edges and loops are drawn as a single curve on the outer side
+        of their nodes, to not overlap the edges in the opposite direction.
+        """
+        direction = -1 if self.mirrored else 1
+        self.routes = []
+        for edge, chain in self.chains:
+            tail, head = edge
+            if tail == head:
+                shift = self._get_depth(tail) / 4
+                start = self._get_side_port(tail, -shift)
+                end = self._get_side_port(tail, shift)
+            elif edge in self.back_edges:
+                start = self._get_side_port(tail)
+                end = self._get_side_port(head)
+            else:
+                points = [self._get_port(chain[0], direction)]
+                points += [self.coordinates[node] for node in chain[1:-1]]
+                points.append(self._get_port(chain[-1], -direction))
+                self.routes.append((edge, points, False))
+                continue
+            points = [start, self._bend(start), self._bend(end), end]
+            self.routes.append((edge, points, True))
+
+
+def _get_path(points, horizontal, curve=False):
+    """Return SVG path data of a smooth line through all points.
+
+    If ``curve`` is set, the points are the start, control and end points
+    of a single cubic Bézier curve.
+    """
+    if curve:
+        start, c1, c2, end = points
+        return f"M{_p(start)} C{_p(c1)} {_p(c2)} {_p(end)}"
+    data = [f"M{_p(points[0])}"]
+    for (x1, y1), (x2, y2) in itertools.pairwise(points):
+        if horizontal:
+            dx = (x2 - x1) / 2
+            data.append(f"C{_p((x1 + dx, y1))} {_p((x2 - dx, y2))} {_p((x2, y2))}")
+        else:
+            dy = (y2 - y1) / 2
+            data.append(f"C{_p((x1, y1 + dy))} {_p((x2, y2 - dy))} {_p((x2, y2))}")
+    return " ".join(data)
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def _p(point):
+    return f"{point[0]:g},{point[1]:g}"
+
+
+def _get_arrow(points, horizontal, curve=False):
+    """Shorten the line's last segment and return the points of an arrowhead."""
+    (x1, y1), (x2, y2) = points[-2], points[-1]
+    if curve:  # the last control point is straight across from the end
+        dx, dy = _sign(x2 - x1), _sign(y2 - y1)
+    elif horizontal:
+        dx, dy = _sign(x2 - x1) or 1, 0
+    else:
+        dx, dy = 0, _sign(y2 - y1) or 1
+    base = (x2 - dx * ARROW_SIZE, y2 - dy * ARROW_SIZE)
+    points[-1] = base
+    half = ARROW_SIZE / 2
+    return [
+        (x2, y2),
+        (base[0] + dy * half, base[1] + dx * half),
+        (base[0] - dy * half, base[1] - dx * half),
+    ]
+
+
+def render_svg(nodes, edges, rankdir="LR"):
+    """Return an SVG image of a workflow graph.
+
+    Args:
+        nodes (dict): :class:`.InstanceGraph.Node` tuples by name.
+        edges (dict): Edge state – ``inactive``, ``active`` or ``dashed`` – by edge.
+        rankdir (str): Direction of the graph.
+
+    Returns:
+        str: SVG document, that can be embedded in HTML.
+
+    """
+    layout = Layout(nodes.keys(), edges.keys(), rankdir=rankdir)
+    width, height = layout.width, layout.height
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}pt"'
+        f' height="{height:g}pt" viewBox="0 0 {width:g} {height:g}">',
+        f'<g font-family="sans-serif" font-size="{FONT_SIZE}" text-anchor="middle">',
+    ]
+
+    for (tail, head), points, curve in layout.routes:
+        state = edges[tail, head]
+        color = "#888888" if state == "inactive" else "black"
+        dash = ' stroke-dasharray="5,2"' if state == "dashed" else ""
+        points = list(points)
+        arrow = _get_arrow(points, layout.horizontal, curve)
+        lines.append(
+            f'<g class="edge"><title>{html.escape(tail)}-&gt;{html.escape(head)}</title>'
+            f'<path fill="none" stroke="{color}"{dash}'
+            f' d="{_get_path(points, layout.horizontal, curve)}"/>'
+            f'<polygon fill="{color}" stroke="{color}"'
+            f' points="{" ".join(map(_p, arrow))}"/></g>'
+        )
+
+    for name, node in nodes.items():
+        x, y = layout.coordinates[name]
+        width, height = layout.sizes[name]
+        classes = node.classes
+        color = "#888888" if "inactive" in classes else "black"
+        attrs = f'fill="white" stroke="{color}"'
+        if "active" in classes:
+            attrs += ' stroke-width="2"'
+        if classes & {"override", "obsolete"}:
+            attrs += ' stroke-dasharray="5,2"'
+        radius = 8 if node.type == HUMAN else 0
+        shapes = [
+            f'<rect x="{x - width / 2:g}" y="{y - height / 2:g}" width="{width:g}"'
+            f' height="{height:g}" rx="{radius}" {attrs}/>'
+        ]
+        if "final" in classes:
+            shapes.append(
+                f'<rect x="{x - width / 2 + 4:g}" y="{y - height / 2 + 4:g}"'
+                f' width="{width - 8:g}" height="{height - 8:g}" rx="{radius}"'
+                f' fill="none" stroke="{color}"/>'
+            )
+        label = html.escape(layout.get_label(name))
+        shapes.append(
+            f'<text x="{x:g}" y="{y:g}" dominant-baseline="central"'
+            f' fill="{color}">{label}</text>'
+        )
+        element = f'<g class="node"><title>{label}</title>{"".join(shapes)}</g>'
+        if node.href:
+            element = f'<a href="{html.escape(node.href)}">{element}</a>'
+        lines.append(element)
+
+    lines += ["</g>", "</svg>"]
+    return "\n".join(lines)
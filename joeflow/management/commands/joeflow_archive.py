@@ -0,0 +1,149 @@
+import datetime
+import gzip
+import itertools
+import json
+
+from django.core.management import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import dateparse, timezone
+
+from joeflow.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Export tasks of finished workflows to compressed JSON Lines and delete them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            type=str,
+            help="Path of the gzip compressed JSON Lines file, tasks are appended.",
+        )
+        parser.add_argument(
+            "--days",
+            dest="days",
+            type=int,
+            default=90,
+            help="Archive workflows finished more than the given days ago. Default: 90",
+        )
+        parser.add_argument(
+            "--before",
+            dest="before",
+            type=str,
+            help="Archive workflows finished before the given ISO date or datetime,"
+            " overrides --days.",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=500,
+            help="Number of workflows archived per transaction. Default: 500",
+        )
+        parser.add_argument(
+            "--keep",
+            dest="keep",
+            action="store_true",
+            help="Export tasks without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = self.get_cutoff(options["before"], options["days"])
+        if options["batch_size"] < 1:
+            raise CommandError("The batch size must be at least 1.")
+
+        # The finished workflows are aggregated once and streamed in batches.
+        workflows = get_finished_workflows(cutoff).iterator(
+            chunk_size=options["batch_size"]
+        )
+        archived = 0
+        with gzip.open(options["output"], "at", encoding="utf-8") as fp:
+            while batch := list(itertools.islice(workflows, options["batch_size"])):
+                archived += archive(batch, fp, delete=not options["keep"])
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Archived tasks of {len(batch)} workflows…")
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                f"Archived {archived} tasks to '{options['output']}'",
+                self.style.SUCCESS,
+            )
+
+    @staticmethod
+    def get_cutoff(before, days):
+        if before is None:
+            return timezone.now() - datetime.timedelta(days=days)
+        cutoff = dateparse.parse_datetime(before)
+        if cutoff is None:
+            date = dateparse.parse_date(before)
+            if date is None:
+                raise CommandError(f"Invalid date: {before!r}")
+            cutoff = datetime.datetime.combine(date, datetime.time())
+        if timezone.is_naive(cutoff):
+            cutoff = timezone.make_aware(cutoff)
+        return cutoff
+
+
+def get_finished_workflows(cutoff):
+    """Return primary keys of workflows whose tasks all completed before the cutoff."""
+    return (
+        Task.objects.order_by()
+        .values("_workflow")
+        .annotate(
+            last_completed=models.Max("completed"),
+            open_tasks=models.Count("pk", filter=models.Q(completed=None)),
+        )
+        .filter(last_completed__lt=cutoff, open_tasks=0)
+        .values_list("_workflow", flat=True)
+        .order_by("_workflow")
+    )
+
+
+def archive(workflow_pks, fp, delete=True):
+    """Write the tasks of the given workflows to a file and delete them.
+
+    Each task is written as a JSON object per line including the primary keys
+    of its parent tasks and assignees. Relations are deleted in bulk.
+
+    Returns:
+        int: Number of archived tasks.
+
+    """
+    tasks = Task.objects.filter(_workflow__in=workflow_pks)
+    Parent = Task.parent_task_set.through
+    Assignee = Task.assignees.through
+    with transaction.atomic():
+        parents = _group(
+            Parent.objects.filter(from_task__in=tasks).values_list(
+                "from_task_id", "to_task_id"
+            )
+        )
+        assignees = _group(
+            Assignee.objects.filter(task__in=tasks).values_list("task_id", "user_id")
+        )
+        count = 0
+        for task in tasks.order_by("pk").values().iterator(chunk_size=2000):
+            task["workflow_id"] = task.pop("_workflow_id")
+            task["parent_task_set"] = parents.get(task["id"], [])
+            task["assignees"] = assignees.get(task["id"], [])
+            fp.write(json.dumps(task, cls=DjangoJSONEncoder))
+            fp.write("\n")
+            count += 1
+        fp.flush()
+        if delete:
+            Parent.objects.filter(
+                models.Q(from_task__in=tasks) | models.Q(to_task__in=tasks)
+            ).delete()
+            Assignee.objects.filter(task__in=tasks).delete()
+            tasks.delete()
+    return count
+
+
+def _group(pairs):
+    groups = {}
+    for key, value in pairs.iterator(chunk_size=2000):
+        groups.setdefault(key, []).append(value)
+    return groups
@@ -1,6 +1,13 @@
-from django.core.management import BaseCommand
+import concurrent.futures
+import hashlib
+import os
+import time
 
+from django.core.management import BaseCommand, CommandError
+
+import joeflow.layout
 import joeflow.models
+from joeflow.conf import settings
 
 
 class Command(BaseCommand):
@@ -29,6 +36,15 @@ class Command(BaseCommand):
             type=str,
             help="Output directory. Default is current working directory.",
         )
+        parser.add_argument(
+            "-e",
+            "--engine",
+            dest="engine",
+            type=str,
+            choices=("dot", "python"),
+            help="Render with Graphviz or the built-in layout, which only supports SVG."
+            " Default: JOEFLOW_GRAPH_ENGINE",
+        )
         parser.add_argument(
             "-c",
             "--cleanup",
@@ -36,33 +52,119 @@ class Command(BaseCommand):
             action="store_true",
             help="Remove dot-files after rendering.",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            dest="jobs",
+            type=int,
+            default=1,
+            help="Number of graphs rendered in parallel. Default: 1",
+        )
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            dest="incremental",
+            action="store_true",
+            help="Skip graphs whose output file is newer than their topology hash.",
+        )
 
     def handle(self, *args, **options):
         workflows = options["workflow"]
         verbosity = options["verbosity"]
         file_format = options["format"]
-        cleanup = options["cleanup"]
         directory = options.get("directory", None)
+        engine = options["engine"] or settings.JOEFLOW_GRAPH_ENGINE
+        is_dot_available = joeflow.layout.is_dot_available()
+        if engine is None:
+            # Only SVG can be rendered without Graphviz.
+            engine = (
+                "python" if file_format == "svg" and not is_dot_available else "dot"
+            )
+        if engine == "dot" and not is_dot_available:
+            raise CommandError(
+                f"Rendering {file_format} requires Graphviz' dot executable,"
+                " which was not found."
+            )
+        if engine == "python" and file_format != "svg":
+            raise CommandError("The python engine only supports the svg format.")
+        if options["jobs"] < 1:
+            raise CommandError("The number of jobs must be at least 1.")
 
         workflows = [
             joeflow.models.get_workflow(s) for s in workflows
         ] or joeflow.models.get_workflows()
 
-        for workflow in filter(None, workflows):
-            if workflow != joeflow.models.Workflow:
-                opt = workflow._meta
-                if verbosity > 0:
-                    self.stdout.write(
-                        f"Rendering graph for '{opt.app_label}.{opt.model_name}'… ",
-                        ending="",
+        # Rendering mostly waits for the dot subprocess, threads suffice.
+        with concurrent.futures.ThreadPoolExecutor(options["jobs"]) as executor:
+            futures = {}
+            for workflow in filter(None, workflows):
+                if workflow == joeflow.models.Workflow:
+                    self.stderr.write(
+                        f"{workflow!r} is not a Workflow subclass", self.style.WARNING
                     )
-                filename = f"{opt.app_label}_{workflow.__name__}".lower()
-                graph = workflow.get_graph()
-                graph.format = file_format
-                graph.render(filename=filename, directory=directory, cleanup=cleanup)
-                if verbosity > 0:
-                    self.stdout.write("Done!", self.style.SUCCESS)
-            else:
-                self.stderr.write(
-                    f"{workflow!r} is not a Workflow subclass", self.style.WARNING
+                    continue
+                future = executor.submit(
+                    self.render,
+                    workflow,
+                    engine=engine,
+                    file_format=file_format,
+                    directory=directory,
+                    cleanup=options["cleanup"],
+                    incremental=options["incremental"],
                 )
+                futures[future] = workflow
+
+            for future in concurrent.futures.as_completed(futures):
+                opt = futures[future]._meta
+                duration = future.result()
+                if verbosity > 0:
+                    if duration is None:
+                        self.stdout.write(
+                            f"Skipped graph for '{opt.app_label}.{opt.model_name}',"
+                            " it is up to date."
+                        )
+                    else:
+                        self.stdout.write(
+                            f"Rendered graph for '{opt.app_label}.{opt.model_name}'"
+                            f" in {duration:.3f}s",
+                            self.style.SUCCESS,
+                        )
+
+    @staticmethod
+    def render(workflow, *, engine, file_format, directory, cleanup, incremental):
+        """Render a workflow graph to file.
+
+        Returns:
+            float: Seconds it took to render the graph or ``None``,
+            if the graph was skipped, because it is up to date.
+
+        """
+        start = time.perf_counter()
+        filename = f"{workflow._meta.app_label}_{workflow.__name__}".lower()
+        path = os.path.join(directory or "", f"{filename}.{file_format}")
+        hash_path = f"{path}.sha256"
+        digest = hashlib.sha256(
+            f"{workflow._get_graph_cache_key(engine)}:{file_format}".encode()
+        ).hexdigest()
+
+        if incremental:
+            try:
+                with open(hash_path) as fp:
+                    is_current = fp.read().strip() == digest
+                is_current &= os.path.getmtime(path) >= os.path.getmtime(hash_path)
+            except OSError:
+                is_current = False
+            if is_current:
+                return None
+            # The hash is written first, the output must be newer to be current.
+            with open(hash_path, "w") as fp:
+                fp.write(digest)
+
+        if engine == "python":
+            with open(path, "w") as fp:
+                fp.write(workflow._render_graph_svg())
+        else:
+            graph = workflow.get_graph()
+            graph.format = file_format
+            graph.render(filename=filename, directory=directory, cleanup=cleanup)
+        return time.perf_counter() - start
@@ -0,0 +1,67 @@
+from django.core.management import BaseCommand
+
+from joeflow.runner.database import Worker
+
+
+class Command(BaseCommand):
+    help = "Execute machine tasks scheduled by the database task runner."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-t",
+            "--threads",
+            dest="threads",
+            type=int,
+            default=4,
+            help="Number of tasks executed in parallel. Default: 4",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=20,
+            help="Maximum number of tasks claimed at once. Default: 20",
+        )
+        parser.add_argument(
+            "-i",
+            "--interval",
+            dest="interval",
+            type=float,
+            default=1,
+            help="Seconds to wait, if no tasks are due. Default: 1",
+        )
+        parser.add_argument(
+            "--lease",
+            dest="lease",
+            type=int,
+            default=300,
+            help="Seconds after which a claimed task may be claimed again. Default: 300",
+        )
+        parser.add_argument(
+            "--retry-delay",
+            dest="retry_delay",
+            type=int,
+            default=10,
+            help="Seconds until a task that returned False is retried. Default: 10",
+        )
+        parser.add_argument(
+            "--burst",
+            dest="burst",
+            action="store_true",
+            help="Stop once no tasks are due.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            threads=options["threads"],
+            batch_size=options["batch_size"],
+            lease=options["lease"],
+            retry_delay=options["retry_delay"],
+        )
+        if options["verbosity"] > 0:
+            self.stdout.write("Waiting for due tasks…")
+        try:
+            worker.run(interval=options["interval"], burst=options["burst"])
+        except KeyboardInterrupt:
+            worker.stop()
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("joeflow", "0002_task_due"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("completed", None)),
+                fields=["_workflow", "name"],
+                name="joeflow_task_open_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["content_type", "status", "created"],
+                name="joeflow_task_ct_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("completed", None), ("status", "scheduled")),
+                fields=["due"],
+                name="joeflow_task_scheduled_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("completed", None), ("type", "human")),
+                fields=["created"],
+                name="joeflow_task_open_human_idx",
+            ),
+        ),
+    ]
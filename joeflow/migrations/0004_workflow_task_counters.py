@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("joeflow", "0003_task_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workflow",
+            name="failed_task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="workflow",
+            name="finished",
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="workflow",
+            name="last_activity",
+            field=models.DateTimeField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="workflow",
+            name="open_task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("joeflow", "0004_workflow_task_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Stacktrace",
+            fields=[
+                (
+                    "fingerprint",
+                    models.CharField(
+                        editable=False, max_length=64, primary_key=True, serialize=False
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("compressed", models.BooleanField(default=False)),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="stacktrace_fingerprint",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=64
+            ),
+        ),
+    ]
@@ -1,11 +1,22 @@
+import functools
+import hashlib
+import itertools
 import logging
 import sys
 import traceback
 import types
 import typing
+import uuid
+import zlib
+from collections import defaultdict
 
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
-from django.db import models, transaction
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, models, router, transaction
+from django.db.models import functions
 from django.db.models.base import ModelBase
 from django.db.models.functions import Now
 from django.urls import NoReverseMatch, path, reverse
@@ -16,9 +27,10 @@ from django.utils.translation import gettext_lazy as t
 from django.views import View
 from django.views.generic.edit import BaseCreateView
 
+from . import __version__, layout
 from .conf import settings
 from .typing import HUMAN, MACHINE
-from .utils import NoDashDiGraph
+from .utils import InstanceGraph, NoDashDiGraph, TaskSummary, Topology
 from .views import StartViewMixin
 
 logger = logging.getLogger(__name__)
@@ -48,6 +60,7 @@ class WorkflowBase(ModelBase):
                     node.workflow_cls = klass
             except TypeError:
                 pass  # not a function
+        klass._topology = Topology(klass.edges)
         if "override_view" in attrs and isinstance(klass.override_view, str):
             klass.override_view = import_string(klass.override_view)
         if "detail_view" in attrs and isinstance(klass.detail_view, str):
@@ -66,9 +79,23 @@ class Workflow(models.Model, metaclass=WorkflowBase):
     created = models.DateTimeField(auto_now_add=True, db_index=True)
     modified = models.DateTimeField(auto_now=True, db_index=True)
 
+    open_task_count = models.PositiveIntegerField(default=0, editable=False)
+    failed_task_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity = models.DateTimeField(
+        blank=True, null=True, editable=False, db_index=True
+    )
+    finished = models.BooleanField(default=False, editable=False, db_index=True)
+
     rankdir = "LR"
     """Direction of the workflow's graph visualization."""
 
+    lock_strategy = None
+    """
+    Strategy used by task runners to lock the workflow.
+
+    Defaults to :attr:`.JOEFLOW_LOCK_STRATEGY`, see :mod:`joeflow.runner.locking`.
+    """
+
     task_set = GenericRelation(
         "joeflow.Task", object_id_field="_workflow_id", for_concrete_model=False
     )
@@ -81,11 +108,71 @@ class Workflow(models.Model, metaclass=WorkflowBase):
             try:
                 update_fields = kwargs["update_fields"]
             except KeyError:
-                pass
+                if (
+                    settings.JOEFLOW_WORKFLOW_COUNTERS
+                    and not self._state.adding
+                    and not kwargs.get("force_insert")
+                ):
+                    # Task counters are updated in place, don't override them.
+                    deferred_fields = self.get_deferred_fields()
+                    kwargs["update_fields"] = [
+                        field.attname
+                        for field in self._meta.concrete_fields
+                        if not field.primary_key
+                        and field.name not in self._task_counter_fields
+                        and field.attname not in deferred_fields
+                    ]
             else:
                 update_fields.append("modified")
         super().save(**kwargs)
 
+    _task_counter_fields = (
+        "open_task_count",
+        "failed_task_count",
+        "last_activity",
+        "finished",
+    )
+
+    @classmethod
+    def update_task_counters(cls):
+        """Recompute the task counters of all workflows of this class.
+
+        The counters are only maintained if :attr:`.JOEFLOW_WORKFLOW_COUNTERS`
+        is enabled. Call this method once after enabling the setting, to count
+        the existing tasks.
+
+        Returns:
+            int: Number of updated workflows.
+
+        """
+        tasks = Task.objects.filter(_workflow=models.OuterRef("pk")).order_by()
+
+        def count(status):
+            return functions.Coalesce(
+                models.Subquery(
+                    tasks.filter(status=status)
+                    .values("_workflow")
+                    .annotate(count=models.Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+
+        open_tasks = tasks.filter(status__in=[Task.SCHEDULED, Task.FAILED])
+        return Workflow.objects.filter(pk__in=cls._base_manager.values("pk")).update(
+            open_task_count=count(Task.SCHEDULED),
+            failed_task_count=count(Task.FAILED),
+            last_activity=models.Subquery(
+                tasks.values("_workflow")
+                .annotate(last_activity=models.Max("modified"))
+                .values("last_activity")
+            ),
+            finished=models.ExpressionWrapper(
+                models.Exists(tasks) & ~models.Exists(open_tasks),
+                output_field=models.BooleanField(),
+            ),
+        )
+
     edges: list[tuple[typing.Any, typing.Any]] = None
     """
     Edges define the transitions between tasks.
@@ -110,11 +197,8 @@ class Workflow(models.Model, metaclass=WorkflowBase):
 
     @classmethod
     def get_nodes(cls):
-        nodes = set()
-        for edge in cls.edges:
-            nodes |= set(edge)
-        for node in nodes:
-            yield node.name, node
+        """Yield name and node tuples in order of their first appearance in edges."""
+        yield from cls._topology.nodes.items()
 
     @classmethod
     def urls(cls):
@@ -166,13 +250,12 @@ class Workflow(models.Model, metaclass=WorkflowBase):
     @classmethod
     def get_node(cls, name: str):
         """Get node by name."""
-        return dict(cls.get_nodes())[name]
+        return cls._topology.nodes[name]
 
     @classmethod
     def get_next_nodes(cls, prev_node):
-        for start, end in cls.edges:
-            if start.name == prev_node.name:
-                yield end
+        """Return all nodes that follow the given node."""
+        return cls._topology.get_next_nodes(prev_node.name)
 
     @classmethod
     def get_url_namespace(cls):
@@ -187,13 +270,7 @@ class Workflow(models.Model, metaclass=WorkflowBase):
         return reverse(f"{self.get_url_namespace()}:override", kwargs={"pk": self.pk})
 
     @classmethod
-    def get_graph(cls, color="black"):
-        """Return workflow graph.
-
-        Returns:
-            (graphviz.Digraph): Directed graph of the workflow.
-
-        """
+    def _get_graph(cls):
         graph = NoDashDiGraph()
         graph.attr("graph", rankdir=cls.rankdir)
         graph.attr(
@@ -205,6 +282,17 @@ class Workflow(models.Model, metaclass=WorkflowBase):
                 "fillcolor": "white",
             },
         )
+        return graph
+
+    @classmethod
+    def get_graph(cls, color="black"):
+        """Return workflow graph.
+
+        Returns:
+            (graphviz.Digraph): Directed graph of the workflow.
+
+        """
+        graph = cls._get_graph()
         for name, node in cls.get_nodes():
             node_style = "filled"
             if node.type == HUMAN:
@@ -235,74 +323,106 @@ class Workflow(models.Model, metaclass=WorkflowBase):
             (django.utils.safestring.SafeString): SVG representation of a running workflow.
 
         """
-        graph = cls.get_graph()
-        graph.format = "svg"
-        return SafeString(graph.pipe(encoding="utf-8"))  # nosec
+        cache = get_cache()
+        engine = get_graph_engine()
+        key = cls._get_graph_cache_key(engine)
+        svg = cache.get(key) if cache is not None else None
+        if svg is None:
+            if engine == "python":
+                svg = cls._render_graph_svg()
+            else:
+                graph = cls.get_graph()
+                graph.format = "svg"
+                svg = graph.pipe(encoding="utf-8")
+            if cache is not None:
+                cache.set(key, svg, timeout=None)
+        return SafeString(svg)  # nosec
 
     get_graph_svg.short_description = t("graph")
 
-    def get_instance_graph(self):
-        """Return workflow instance graph."""
-        graph = self.get_graph(color="#888888")
+    @classmethod
+    def _get_graph_cache_key(cls, engine):
+        digest = hashlib.sha256(
+            f"{cls._topology.digest}:{cls.rankdir}:{engine}".encode()
+        ).hexdigest()
+        return f"joeflow:{__version__}:{cls._meta.label_lower}:graph:{digest}"
 
-        names = dict(self.get_nodes()).keys()
+    @classmethod
+    def _render_graph_svg(cls):
+        """Render the workflow graph as SVG without Graphviz."""
+        nodes = {
+            name: InstanceGraph.Node(name, node.type, frozenset(), None)
+            for name, node in cls.get_nodes()
+        }
+        edges = dict.fromkeys(
+            ((start.name, end.name) for start, end in cls.edges), "active"
+        )
+        return layout.render_svg(nodes, edges, rankdir=cls.rankdir)
 
-        for task in self.task_set.filter(name__in=names):
-            href = task.get_absolute_url()
-            style = "filled"
-            peripheries = "1"
-
-            if task.type == HUMAN:
-                style += ", rounded"
-            if not task.completed:
-                style += ", bold"
-            if not task.child_task_set.all() and task.completed:
-                peripheries = "2"
-            graph.node(
-                task.name,
-                href=href,
-                style=style,
-                color="black",
-                fontcolor="black",
-                peripheries=peripheries,
-            )
-            for child in task.child_task_set.exclude(name="override"):
-                graph.edge(task.name, child.name, color="black")
+    @functools.cached_property
+    def instance_graph(self):
+        """Return nodes and edges of this workflow instance.
 
-        for task in self.task_set.filter(name="override").prefetch_related(
-            "parent_task_set", "child_task_set"
-        ):
-            label = f"override_{task.pk}"
-            peripheries = "1"
-            for parent in task.parent_task_set.all():
-                graph.edge(parent.name, f"override_{task.pk}", style="dashed")
-            for child in task.child_task_set.all():
-                graph.edge(f"override_{task.pk}", child.name, style="dashed")
-            if not task.child_task_set.all() and task.completed:
-                peripheries = "2"
-            graph.node(label, style="filled, rounded, dashed", peripheries=peripheries)
-
-        for task in self.task_set.exclude(name__in=names).exclude(name="override"):
-            style = "filled, dashed"
-            peripheries = "1"
-            if task.type == HUMAN:
-                style += ", rounded"
-            if not task.completed:
-                style += ", bold"
-            for parent in task.parent_task_set.all():
-                graph.edge(parent.name, task.name, style="dashed")
-            for child in task.child_task_set.all():
-                graph.edge(task.name, child.name, style="dashed")
-            if not task.child_task_set.all() and task.completed:
-                peripheries = "2"
-            graph.node(
-                task.name,
-                style=style,
-                color="black",
-                fontcolor="black",
-                peripheries=peripheries,
-            )
+        The result is memoized per instance and shared by all graph serializers,
+        it is reset by :meth:`refresh_from_db`.
+
+        Workflows with more tasks than :attr:`.JOEFLOW_INSTANCE_GRAPH_MAX_TASKS`
+        are aggregated by node name, see :meth:`get_task_summary`.
+
+        Returns:
+            (joeflow.utils.InstanceGraph): Format independent instance graph.
+
+        """
+        max_tasks = settings.JOEFLOW_INSTANCE_GRAPH_MAX_TASKS
+        if max_tasks is not None:
+            summary = self.get_task_summary()
+            if sum(task.count for task in summary.values()) > max_tasks:
+                return InstanceGraph(self, summary=summary)
+        return InstanceGraph(self)
+
+    def get_task_summary(self):
+        """Return the tasks of this workflow aggregated by name.
+
+        Returns:
+            dict[str, joeflow.utils.TaskSummary]: Task counts, first and last
+            creation time and the number of tasks per status by name.
+
+        """
+        return self.task_set.summary()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop("instance_graph", None)
 
+    def get_instance_graph(self):
+        """Return workflow instance graph."""
+        graph = self._get_graph()
+        for name, node in self.instance_graph.nodes.items():
+            style = "filled"
+            if "override" in node.classes:
+                style += ", rounded, dashed"
+                attrs = {}
+            else:
+                if "obsolete" in node.classes:
+                    style += ", dashed"
+                if node.type == HUMAN:
+                    style += ", rounded"
+                if "active" in node.classes:
+                    style += ", bold"
+                color = "#888888" if "inactive" in node.classes else "black"
+                attrs = {"color": color, "fontcolor": color}
+            if node.href:
+                attrs["href"] = node.href
+            if "inactive" not in node.classes:
+                attrs["peripheries"] = "2" if "final" in node.classes else "1"
+            graph.node(name, style=style, **attrs)
+
+        for (start, end), edge in self.instance_graph.edges.items():
+            if edge == "dashed":
+                graph.edge(start, end, style="dashed")
+            else:
+                color = "black" if edge == "active" else "#888888"
+                graph.edge(start, end, color=color)
         return graph
 
     def get_instance_graph_svg(self, output_format="svg"):
@@ -324,164 +444,151 @@ class Workflow(models.Model, metaclass=WorkflowBase):
             (django.utils.safestring.SafeString): SVG representation of a running workflow.
 
         """
-        graph = self.get_instance_graph()
-        graph.format = output_format
-        return SafeString(graph.pipe(encoding="utf-8"))  # nosec
+        cache = get_shared_cache()
+        engine = get_graph_engine() if output_format == "svg" else "dot"
+        key = (
+            self._get_instance_graph_cache_key(output_format, engine) if cache else None
+        )
+        svg = cache.get(key) if cache is not None else None
+        if svg is None:
+            if engine == "python":
+                graph = self.instance_graph
+                svg = layout.render_svg(graph.nodes, graph.edges, rankdir=graph.rankdir)
+            else:
+                graph = self.get_instance_graph()
+                graph.format = output_format
+                svg = graph.pipe(encoding="utf-8")
+            if cache is not None:
+                cache.set(key, svg)
+        return SafeString(svg)  # nosec
 
     get_instance_graph_svg.short_description = t("instance graph")
 
+    def _get_instance_graph_cache_key(self, output_format, engine):
+        cache = get_shared_cache()
+        version_key = _get_graph_version_key(type(self), self.pk)
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(version_key)
+        return (
+            f"joeflow:{__version__}:{self._meta.label_lower}:{self.pk}"
+            f":instance_graph:{version}:{engine}:{output_format}"
+        )
+
+    def invalidate_instance_graph(self):
+        """Render the instance graph again, once the current transaction is committed.
+
+        Task state changes invalidate the graph automatically.
+        """
+        self.__dict__.pop("instance_graph", None)
+        _invalidate_instance_graph(type(self), self.pk)
+
     def get_instance_graph_mermaid(self):
         """Return instance graph as Mermaid diagram syntax.
 
         This can be used with MermaidJS for client-side rendering in admin.
+        Nodes and edges of the same style are grouped into shared classes,
+        repeated tasks are collapsed into a single node with their count.
 
         Returns:
             (str): Mermaid diagram syntax for the instance graph.
         """
-        lines = [f"graph {self.rankdir}"]
-        node_styles = []
-        edge_styles = {}  # Map of (start, end) -> style
-        edge_list = []  # List to maintain order of edges
-
-        names = dict(self.get_nodes()).keys()
-
-        # Add all nodes from workflow definition (inactive/gray style)
-        for name, node in self.get_nodes():
-            node_id = name.replace(" ", "_")
-            # Keep original name with spaces for label
-            label = name.replace("_", " ")
-
-            # Determine shape based on node type, quote IDs to handle reserved words
-            if node.type == HUMAN:
-                lines.append(f"    '{node_id}'({label})")
-            else:
-                lines.append(f"    '{node_id}'[{label}]")
-
-            # Default gray styling for nodes not yet processed
-            node_styles.append(
-                f"    style '{node_id}' fill:#f9f9f9,stroke:#999,color:#999"
-            )
-
-        # Add edges from workflow definition with default gray style
-        for start, end in self.edges:
-            start_id = start.name.replace(" ", "_")
-            end_id = end.name.replace(" ", "_")
-            edge_key = (start_id, end_id)
-            if edge_key not in edge_styles:
-                edge_list.append(edge_key)
-                edge_styles[edge_key] = "stroke:#999"
-
-        # Process actual tasks to highlight active/completed states
-        for task in self.task_set.filter(name__in=names):
-            node_id = task.name.replace(" ", "_")
-
-            # Active tasks (not completed) get bold black styling
-            if not task.completed:
-                node_styles.append(
-                    f"    style '{node_id}' fill:#fff,stroke:#000,stroke-width:3px,color:#000"
-                )
-            else:
-                # Completed tasks get normal black styling
-                node_styles.append(
-                    f"    style '{node_id}' fill:#fff,stroke:#000,stroke-width:2px,color:#000"
-                )
-
-            # Update edge styling for actual task connections (black style)
-            for child in task.child_task_set.exclude(name="override"):
-                child_id = child.name.replace(" ", "_")
-                edge_key = (node_id, child_id)
-                if edge_key not in edge_styles:
-                    edge_list.append(edge_key)
-                # Update styling to black (overrides gray)
-                edge_styles[edge_key] = "stroke:#000,stroke-width:2px"
-
-        # Handle override tasks
-        for task in self.task_set.filter(name="override").prefetch_related(
-            "parent_task_set", "child_task_set"
-        ):
-            override_id = f"override_{task.pk}"
-            override_label = f"override {task.pk}"
-
-            # Add override node with dashed style, quote ID
-            lines.append(f"    '{override_id}'({override_label})")
-            node_styles.append(
-                f"    style '{override_id}' fill:#fff,stroke:#000,stroke-width:2px,stroke-dasharray:5 5,color:#000"
-            )
-
-            # Add dashed edges for override connections
-            for parent in task.parent_task_set.all():
-                parent_id = parent.name.replace(" ", "_")
-                edge_key = (parent_id, override_id)
-                if edge_key not in edge_styles:
-                    edge_list.append(edge_key)
-                edge_styles[edge_key] = "stroke:#000,stroke-dasharray:5 5"
-
-            for child in task.child_task_set.all():
-                child_id = child.name.replace(" ", "_")
-                edge_key = (override_id, child_id)
-                if edge_key not in edge_styles:
-                    edge_list.append(edge_key)
-                edge_styles[edge_key] = "stroke:#000,stroke-dasharray:5 5"
-
-        # Handle obsolete/custom tasks (not in workflow definition)
-        for task in self.task_set.exclude(name__in=names).exclude(name="override"):
-            node_id = task.name.replace(" ", "_")
-            # Keep original name with spaces for label
-            label = task.name.replace("_", " ")
-
-            # Determine shape based on node type, quote IDs
-            if task.type == HUMAN:
-                lines.append(f"    '{node_id}'({label})")
-            else:
-                lines.append(f"    '{node_id}'[{label}]")
+        cache = get_shared_cache()
+        key = (
+            self._get_instance_graph_cache_key("mermaid", "mermaid") if cache else None
+        )
+        mermaid = cache.get(key) if cache is not None else None
+        if mermaid is None:
+            mermaid = _render_mermaid(self.instance_graph)
+            if cache is not None:
+                cache.set(key, mermaid)
+        return mermaid
 
-            # Dashed styling for obsolete tasks
-            if not task.completed:
-                node_styles.append(
-                    f"    style '{node_id}' fill:#fff,stroke:#000,stroke-width:3px,stroke-dasharray:5 5,color:#000"
-                )
-            else:
-                node_styles.append(
-                    f"    style '{node_id}' fill:#fff,stroke:#000,stroke-width:2px,stroke-dasharray:5 5,color:#000"
-                )
+    def cancel(self, user=None):
+        self.task_set.cancel(user)
+        self.invalidate_instance_graph()
 
-            # Add dashed edges for obsolete task connections
-            for parent in task.parent_task_set.all():
-                parent_id = parent.name.replace(" ", "_")
-                edge_key = (parent_id, node_id)
-                if edge_key not in edge_styles:
-                    edge_list.append(edge_key)
-                edge_styles[edge_key] = "stroke:#000,stroke-dasharray:5 5"
-
-            for child in task.child_task_set.all():
-                child_id = child.name.replace(" ", "_")
-                edge_key = (node_id, child_id)
-                if edge_key not in edge_styles:
-                    edge_list.append(edge_key)
-                edge_styles[edge_key] = "stroke:#000,stroke-dasharray:5 5"
-
-        # Add edges to output (using dotted arrow for dashed edges)
-        for start_id, end_id in edge_list:
-            style = edge_styles[(start_id, end_id)]
-            if "dasharray" in style:
-                # Use dotted arrow for dashed edges
-                lines.append(f"    '{start_id}' -.-> '{end_id}'")
-            else:
-                # Use solid arrow for normal edges
-                lines.append(f"    '{start_id}' --> '{end_id}'")
+    @classmethod
+    def cancel_all(cls, queryset=None, user=None):
+        """Cancel the open tasks of many workflows of this class at once.
 
-        # Add all styling at the end
-        lines.extend(node_styles)
+        Args:
+            queryset (django.db.models.QuerySet):
+                Workflows to cancel, defaults to all workflows of this class.
+            user (django.contrib.auth.models.AbstractBaseUser):
+                User who canceled the workflows.
 
-        # Add edge styling
-        for idx, (start_id, end_id) in enumerate(edge_list):
-            style = edge_styles[(start_id, end_id)]
-            lines.append(f"    linkStyle {idx} {style}")
+        Returns:
+            int: Number of canceled tasks.
 
-        return "\n".join(lines)
+        """
+        tasks = Task.objects.filter(
+            content_type=ContentType.objects.get_for_model(
+                cls, for_concrete_model=False
+            ),
+            completed=None,
+        )
+        if queryset is not None:
+            tasks = tasks.filter(_workflow__in=queryset.order_by().values("pk"))
+        return tasks.cancel(user)
+
+
+MERMAID_CLASSES = {
+    "inactive": "fill:#f9f9f9,stroke:#999,color:#999",
+    "active": "fill:#fff,stroke:#000,stroke-width:3px,color:#000",
+    "completed": "fill:#fff,stroke:#000,stroke-width:2px,color:#000",
+    "active_dashed": (
+        "fill:#fff,stroke:#000,stroke-width:3px,stroke-dasharray:5 5,color:#000"
+    ),
+    "completed_dashed": (
+        "fill:#fff,stroke:#000,stroke-width:2px,stroke-dasharray:5 5,color:#000"
+    ),
+}
+
+MERMAID_LINK_STYLES = {
+    "inactive": "stroke:#999",
+    "active": "stroke:#000,stroke-width:2px",
+    "dashed": "stroke:#000,stroke-dasharray:5 5",
+}
+
+
+def _render_mermaid(graph):
+    # Quote IDs to handle reserved words, keep spaces in labels
+    ids = {name: f"'{name.replace(' ', '_')}'" for name in graph.nodes}
+    lines = [f"graph {graph.rankdir}"]
+    classes = defaultdict(list)
+    for name, node in graph.nodes.items():
+        label = name.replace("_", " ")
+        if node.iterations > 1:
+            label += f" ×{node.iterations}"
+        if node.type == HUMAN:
+            lines.append(f"    {ids[name]}({label})")
+        else:
+            lines.append(f"    {ids[name]}[{label}]")
 
-    def cancel(self, user=None):
-        self.task_set.cancel(user)
+        if "inactive" in node.classes:
+            class_name = "inactive"
+        else:
+            class_name = "active" if "active" in node.classes else "completed"
+            if node.classes & {"override", "obsolete"}:
+                class_name += "_dashed"
+        classes[class_name].append(ids[name])
+
+    links = defaultdict(list)
+    for index, ((start, end), edge) in enumerate(graph.edges.items()):
+        arrow = "-.->" if edge == "dashed" else "-->"
+        lines.append(f"    {ids[start]} {arrow} {ids[end]}")
+        links[edge].append(str(index))
+
+    for class_name, style in MERMAID_CLASSES.items():
+        if class_name in classes:
+            lines.append(f"    classDef {class_name} {style}")
+            lines.append(f"    class {','.join(classes[class_name])} {class_name}")
+    for edge, style in MERMAID_LINK_STYLES.items():
+        if edge in links:
+            lines.append(f"    linkStyle {','.join(links[edge])} {style}")
+    return "\n".join(lines)
 
 
 def workflow_state_subclasses():
@@ -495,7 +602,78 @@ def workflow_state_subclasses():
     return query
 
 
+class PrefetchWorkflowIterable(models.query.ModelIterable):
+    """Yield tasks with their workflows, fetched in bulk per workflow class."""
+
+    batch_size = 2000
+
+    def __iter__(self):
+        tasks = super().__iter__()
+        while chunk := list(itertools.islice(tasks, self.batch_size)):
+            _prefetch_workflows(chunk, using=self.queryset.db)
+            yield from chunk
+
+
+def _prefetch_workflows(tasks, using=None):
+    workflow_pks = defaultdict(set)
+    for task in tasks:
+        workflow_pks[task.content_type_id].add(task._workflow_id)
+    workflows = {}
+    for content_type_id, pks in workflow_pks.items():
+        workflow_cls = ContentType.objects.get_for_id(content_type_id).model_class()
+        if workflow_cls is not None:
+            workflows[content_type_id] = workflow_cls._base_manager.using(
+                using
+            ).in_bulk(pks)
+    for task in tasks:
+        try:
+            task.workflow = workflows[task.content_type_id][task._workflow_id]
+        except KeyError:
+            pass  # the workflow class no longer exists
+
+
 class TasksQuerySet(models.query.QuerySet):
+    def inbox(self, user, after=None):
+        """Return open human tasks assigned to a user, newest first.
+
+        Workflows are fetched with a single query per workflow class, like
+        :meth:`with_workflows`. The tasks are paginated by their creation time,
+        rather than by offset, e.g.::
+
+            page = Task.objects.inbox(user)[:20]
+            next_page = Task.objects.inbox(user, after=page[-1].pk)[:20]
+
+        Args:
+            user (django.contrib.auth.models.AbstractUser): Assignee of the tasks.
+            after (int): Primary key of the last task of the previous page.
+
+        Returns:
+            TasksQuerySet: Tasks ordered by creation time and primary key.
+
+        """
+        queryset = self.filter(assignees=user, type=HUMAN, completed=None)
+        if after is not None:
+            created = self.model.objects.filter(pk=after).values("created")
+            queryset = queryset.filter(
+                models.Q(created__lt=models.Subquery(created))
+                | models.Q(created=models.Subquery(created), pk__lt=after)
+            )
+        return queryset.order_by("-created", "-pk").with_workflows()
+
+    def with_workflows(self):
+        """Fetch the workflows of all tasks in bulk.
+
+        Workflows are fetched with a single query per workflow class, instead
+        of one query per task, once the queryset is evaluated.
+
+        Returns:
+            TasksQuerySet: Tasks with their workflows attached.
+
+        """
+        queryset = self.all()
+        queryset._iterable_class = PrefetchWorkflowIterable
+        return queryset
+
     def scheduled(self):
         return self.filter(status=self.model.SCHEDULED)
 
@@ -514,14 +692,135 @@ class TasksQuerySet(models.query.QuerySet):
     def canceled(self):
         return self.filter(status=self.model.CANCELED)
 
+    def summary(self):
+        """Aggregate tasks by name in a single query.
+
+        Returns:
+            dict[str, joeflow.utils.TaskSummary]: Task summaries by name.
+
+        """
+        summary = {}
+        for row in (
+            self.order_by()
+            .values("name", "type", "status")
+            .annotate(
+                count=models.Count("pk"),
+                first=models.Min("created"),
+                last=models.Max("created"),
+            )
+            .order_by("first")
+        ):
+            try:
+                task_summary = summary[row["name"]]
+            except KeyError:
+                summary[row["name"]] = TaskSummary(
+                    name=row["name"],
+                    type=row["type"],
+                    count=row["count"],
+                    first=row["first"],
+                    last=row["last"],
+                    statuses={row["status"]: row["count"]},
+                )
+            else:
+                task_summary.statuses[row["status"]] = row["count"]
+                summary[row["name"]] = task_summary._replace(
+                    count=task_summary.count + row["count"],
+                    last=max(task_summary.last, row["last"]),
+                )
+        return summary
+
+    def enqueue(self, countdown=None, eta=None, batch_size=1000):
+        """Schedule all tasks for execution again, e.g. to rerun failed tasks.
+
+        All tasks are reset with a single update. Once the transaction is
+        committed, they are handed to the task runner in batches.
+
+        Args:
+            countdown (int):
+                Time in seconds until the time should be started.
+            eta (datetime.datetime):
+                Time at which the task should be started.
+            batch_size (int):
+                Maximum number of tasks handed to the task runner at once.
+
+        Returns:
+            int: Number of scheduled tasks.
+
+        """
+        with transaction.atomic(using=self.db):
+            rows = list(
+                self.select_for_update()
+                .order_by("pk")
+                .values_list("pk", "_workflow_id", "content_type_id", "status")
+            )
+            _update_task_counters_in_bulk(
+                self,
+                opened=models.Count(
+                    "pk", filter=~models.Q(status=self.model.SCHEDULED)
+                ),
+                failed=-models.Count("pk", filter=models.Q(status=self.model.FAILED)),
+            )
+            self.update(
+                status=self.model.SCHEDULED,
+                completed=None,
+                exception="",
+                stacktrace="",
+                stacktrace_fingerprint="",
+            )
+            _invalidate_instance_graphs(
+                {
+                    (content_type_id, workflow_pk)
+                    for _, workflow_pk, content_type_id, _ in rows
+                },
+                using=self.db,
+            )
+
+        tasks = [
+            self.model(pk=pk, _workflow_id=workflow_pk, content_type_id=content_type_id)
+            for pk, workflow_pk, content_type_id, _ in rows
+        ]
+
+        def publish():
+            for i in range(0, len(tasks), batch_size):
+                _enqueue(tasks[i : i + batch_size], countdown=countdown, eta=eta)
+
+        _unmark_canceled([pk for pk, *_ in rows], using=self.db)
+        transaction.on_commit(publish, using=self.db)
+        return len(rows)
+
     def cancel(self, user=None):
         if user and not user.is_authenticated:
             user = None
-        return self.update(
-            status=self.model.CANCELED,
-            completed_by_user=user,
-            completed=Now(),
-        )
+        completed = timezone.now()
+        if get_shared_cache() is not None:
+            # The canceled tasks are selected again by their completion time
+            # once committed, rather than holding all primary keys in memory.
+            _mark_canceled(
+                self.model.objects.using(self.db)
+                .filter(status=self.model.CANCELED, completed=completed)
+                .values_list("pk", flat=True)
+                .iterator(chunk_size=CACHE_BATCH_SIZE),
+                using=self.db,
+            )
+            _invalidate_instance_graphs(
+                self.order_by()
+                .values_list("content_type_id", "_workflow_id")
+                .distinct(),
+                using=self.db,
+            )
+        with transaction.atomic(using=self.db):
+            _update_task_counters_in_bulk(
+                self,
+                opened=-models.Count(
+                    "pk", filter=models.Q(status=self.model.SCHEDULED)
+                ),
+                failed=-models.Count("pk", filter=models.Q(status=self.model.FAILED)),
+            )
+            return self.update(
+                status=self.model.CANCELED,
+                completed_by_user=user,
+                completed=completed,
+            )
 
 
 class Task(models.Model):
@@ -601,9 +900,13 @@ class Task(models.Model):
     completed = models.DateTimeField(
         blank=True, null=True, editable=False, db_index=True
     )
+    due = models.DateTimeField(blank=True, null=True, editable=False, db_index=True)
 
     exception = models.TextField(blank=True)
     stacktrace = models.TextField(blank=True)
+    stacktrace_fingerprint = models.CharField(
+        max_length=64, blank=True, editable=False, db_index=True
+    )
 
     objects = TasksQuerySet.as_manager()
 
@@ -615,6 +918,31 @@ class Task(models.Model):
             ("cancel", t("Can cancel failed tasks.")),
         )
         default_manager_name = "objects"
+        indexes = [
+            # open tasks of a workflow by name, e.g. joins
+            models.Index(
+                fields=["_workflow", "name"],
+                condition=models.Q(completed=None),
+                name="joeflow_task_open_name_idx",
+            ),
+            # admin changelist filters
+            models.Index(
+                fields=["content_type", "status", "created"],
+                name="joeflow_task_ct_status_idx",
+            ),
+            # due tasks claimed by the database workers
+            models.Index(
+                fields=["due"],
+                condition=models.Q(status="scheduled", completed=None),
+                name="joeflow_task_scheduled_due_idx",
+            ),
+            # open human tasks, e.g. inboxes
+            models.Index(
+                fields=["created"],
+                condition=models.Q(type=HUMAN, completed=None),
+                name="joeflow_task_open_human_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.pk})"
@@ -629,7 +957,10 @@ class Task(models.Model):
                 ) from e
             else:
                 update_fields.append("modified")
-        super().save(**kwargs)
+            super().save(**kwargs)
+        else:
+            super().save(**kwargs)
+            self._update_task_counters(None)
 
     def get_absolute_url(self):
         if self.completed:
@@ -644,7 +975,35 @@ class Task(models.Model):
     def node(self):
         return getattr(type(self.workflow), self.name)
 
+    def _invalidate_instance_graph(self):
+        if get_shared_cache() is not None:
+            _invalidate_instance_graph(
+                ContentType.objects.get_for_id(self.content_type_id).model_class(),
+                self._workflow_id,
+            )
+
+    @staticmethod
+    def is_canceled(task_pk):
+        """Return whether a task has been canceled, without querying the database.
+
+        Runners call this before locking a task, to drop messages of canceled
+        tasks early. Only tasks canceled within the last
+        :attr:`.JOEFLOW_CANCEL_MARKER_TIMEOUT` seconds are known, a return
+        value of ``False`` does therefore not guarantee the task is scheduled.
+        """
+        cache = get_shared_cache()
+        return cache is not None and cache.get(_get_cancel_key(task_pk)) is not None
+
+    def _update_task_counters(self, previous_status):
+        _update_task_counters(
+            self._workflow_id,
+            opened=(self.status == self.SCHEDULED)
+            - (previous_status == self.SCHEDULED),
+            failed=(self.status == self.FAILED) - (previous_status == self.FAILED),
+        )
+
     def finish(self, user=None):
+        previous_status = self.status
         self.completed = timezone.now()
         self.status = self.SUCCEEDED
         if user and not user.is_authenticated:
@@ -652,24 +1011,59 @@ class Task(models.Model):
         self.completed_by_user = user
         if self.pk:
             self.save(update_fields=["status", "completed", "completed_by_user"])
+            self._update_task_counters(previous_status)
         else:
             self.save()
+        self._invalidate_instance_graph()
 
     def cancel(self, user=None):
+        previous_status = self.status
         self.completed = timezone.now()
         self.status = self.CANCELED
         if user and not user.is_authenticated:
             user = None
         self.completed_by_user = user
         self.save(update_fields=["status", "completed", "completed_by_user"])
+        self._update_task_counters(previous_status)
+        self._invalidate_instance_graph()
+        _mark_canceled([self.pk], using=self._state.db)
 
     def fail(self):
+        previous_status = self.status
         self.completed = timezone.now()
         self.status = self.FAILED
-        tb = traceback.format_exception(*sys.exc_info())
+        max_frames = settings.JOEFLOW_STACKTRACE_MAX_FRAMES
+        # A negative limit keeps the innermost frames, where the error was raised.
+        tb = traceback.format_exception(
+            *sys.exc_info(), limit=-max_frames if max_frames else None
+        )
         self.exception = tb[-1].strip()
         self.stacktrace = "".join(tb)
-        self.save(update_fields=["status", "exception", "stacktrace"])
+        self.stacktrace_fingerprint = hashlib.sha256(
+            self.stacktrace.encode()
+        ).hexdigest()
+        if settings.JOEFLOW_STACKTRACE_SHARED:
+            Stacktrace.store(self.stacktrace_fingerprint, self.stacktrace)
+            self.stacktrace = ""
+        self.save(
+            update_fields=[
+                "status",
+                "exception",
+                "stacktrace",
+                "stacktrace_fingerprint",
+            ]
+        )
+        self._update_task_counters(previous_status)
+        self._invalidate_instance_graph()
+
+    def get_stacktrace(self):
+        """Return the stacktrace of a failed task, even if it is shared."""
+        if self.stacktrace or not self.stacktrace_fingerprint:
+            return self.stacktrace
+        try:
+            return Stacktrace.objects.get(pk=self.stacktrace_fingerprint).text
+        except Stacktrace.DoesNotExist:
+            return ""
 
     def enqueue(self, countdown=None, eta=None):
         """Schedule the tasks for execution.
@@ -685,24 +1079,35 @@ class Task(models.Model):
             celery.result.AsyncResult: Celery task result.
 
         """
+        previous_status = self.status
         self.status = self.SCHEDULED
         self.completed = None
         self.exception = ""
         self.stacktrace = ""
-        self.save(update_fields=["status", "completed", "exception", "stacktrace"])
-        task_runner = import_string(settings.JOEFLOW_TASK_RUNNER)
-        transaction.on_commit(
-            lambda: task_runner(
-                task_pk=self.pk,
-                workflow_pk=self._workflow_id,
-                countdown=countdown,
-                eta=eta,
-            )
+        self.stacktrace_fingerprint = ""
+        self.save(
+            update_fields=[
+                "status",
+                "completed",
+                "exception",
+                "stacktrace",
+                "stacktrace_fingerprint",
+            ]
         )
+        self._update_task_counters(previous_status)
+        self._invalidate_instance_graph()
+        _unmark_canceled([self.pk], using=self._state.db)
+        transaction.on_commit(lambda: _enqueue([self], countdown=countdown, eta=eta))
 
     def start_next_tasks(self, next_nodes: list = None):
         """Start new tasks following another tasks.
 
+        All new tasks and their relations to the preceding task are inserted in bulk.
+        Machine tasks are handed to the task runner in a single batch once the
+        current transaction is committed. Nodes may implement a ``get_eta`` method,
+        that receives the new task and returns the time it should be executed at,
+        as well as an ``is_ready`` method, to delay scheduling of their task.
+
         Args:
             self (Task): The task that precedes the next tasks.
             next_nodes (list):
@@ -711,22 +1116,283 @@ class Task(models.Model):
                 possible edges.
 
         """
+        workflow = self.workflow
         if next_nodes is None:
-            next_nodes = self.workflow.get_next_nodes(self.node)
+            next_nodes = workflow.get_next_nodes(self.node)
         tasks = []
+        new_tasks = []
         for node in next_nodes:
             try:
                 # Some nodes – like Join – implement their own method to create new tasks.
-                task = node.create_task(self.workflow, self)
+                create_task = node.create_task
             except AttributeError:
-                task = self.workflow.task_set.create(
-                    name=node.name, type=node.type, workflow=self.workflow
+                task = Task(name=node.name, type=node.type, workflow=workflow)
+                new_tasks.append(task)
+            else:
+                task = create_task(workflow, self)
+            tasks.append((node, task))
+
+        db_features = connections[router.db_for_write(Task)].features
+        if db_features.can_return_rows_from_bulk_insert:
+            Task.objects.bulk_create(new_tasks)
+            if new_tasks:
+                _update_task_counters(workflow.pk, opened=len(new_tasks))
+        else:
+            for task in new_tasks:
+                task.save()
+
+        Task.parent_task_set.through.objects.bulk_create(
+            [
+                Task.parent_task_set.through(from_task_id=task.pk, to_task_id=self.pk)
+                for node, task in tasks
+            ],
+            ignore_conflicts=True,
+        )
+
+        scheduled = defaultdict(list)
+        for node, task in tasks:
+            if not callable(node):
+                continue
+            # Some nodes – like Join – wait for other tasks before they are scheduled.
+            is_ready = getattr(node, "is_ready", None)
+            if is_ready and not is_ready(task):
+                continue
+            # Some nodes – like Wait – define when their task should be executed.
+            get_eta = getattr(node, "get_eta", None)
+            scheduled[get_eta(task) if get_eta else None].append(task)
+        for eta, batch in scheduled.items():
+            transaction.on_commit(functools.partial(_enqueue, batch, eta=eta))
+        workflow.invalidate_instance_graph()
+        return [task for node, task in tasks]
+
+
+class Stacktrace(models.Model):
+    """Stacktrace stored once for all tasks that failed the same way.
+
+    Stacktraces are only shared, if :attr:`.JOEFLOW_STACKTRACE_SHARED` is
+    enabled. Tasks reference them by their ``stacktrace_fingerprint``.
+    """
+
+    fingerprint = models.CharField(max_length=64, primary_key=True, editable=False)
+    data = models.BinaryField()
+    compressed = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.fingerprint
+
+    @property
+    def text(self):
+        data = bytes(self.data)
+        if self.compressed:
+            data = zlib.decompress(data)
+        return data.decode()
+
+    @classmethod
+    def store(cls, fingerprint, text):
+        """Store a stacktrace, unless it is already known."""
+        data = text.encode()
+        compressed = settings.JOEFLOW_STACKTRACE_COMPRESS
+        if compressed:
+            data = zlib.compress(data)
+        # Concurrent failures may insert the same stacktrace.
+        cls.objects.bulk_create(
+            [cls(fingerprint=fingerprint, data=data, compressed=compressed)],
+            ignore_conflicts=True,
+        )
+
+
+@functools.cache
+def _get_task_runner(path):
+    """Import a task runner and its optional ``_many`` counterpart once."""
+    task_runner = import_string(path)
+    try:
+        task_runner_many = import_string(f"{path}_many")
+    except ImportError:
+        task_runner_many = None
+    return task_runner, task_runner_many
+
+
+def _enqueue(tasks, countdown=None, eta=None):
+    """Hand the given tasks to the task runner.
+
+    Runners may define a ``task_runner_many`` function next to their ``task_runner``
+    to publish all tasks at once. Otherwise, tasks are published one by one.
+    """
+    task_runner, task_runner_many = _get_task_runner(settings.JOEFLOW_TASK_RUNNER)
+    if task_runner_many is not None:
+        task_runner_many(tasks, countdown=countdown, eta=eta)
+        return
+    for task in tasks:
+        task_runner(
+            task_pk=task.pk,
+            workflow_pk=task._workflow_id,
+            countdown=countdown,
+            eta=eta,
+        )
+
+
+CACHE_BATCH_SIZE = 1000
+
+
+def get_cache():
+    """Return the cache used for rendered graphs or ``None`` if it is disabled."""
+    if settings.JOEFLOW_CACHE:
+        return caches[settings.JOEFLOW_CACHE]
+
+
+def get_shared_cache():
+    """Return the cache, if it is shared between processes, or ``None``.
+
+    Instance graphs and cancel markers change with the tasks, mostly in worker
+    processes. They are not cached in a per-process cache, like the local
+    memory cache, since other processes would never see them change.
+    """
+    cache = get_cache()
+    if cache is not None and not isinstance(cache, (LocMemCache, DummyCache)):
+        return cache
+
+
+def _get_graph_version_key(workflow_cls, workflow_pk):
+    return f"joeflow:{workflow_cls._meta.label_lower}:{workflow_pk}:graph_version"
+
+
+def _invalidate_instance_graph(workflow_cls, workflow_pk):
+    """Bump the instance graph version, once the transaction is committed."""
+    cache = get_shared_cache()
+    if cache is not None:
+        key = _get_graph_version_key(workflow_cls, workflow_pk)
+        transaction.on_commit(
+            lambda: cache.set(key, uuid.uuid4().hex, timeout=None),
+            using=router.db_for_write(workflow_cls),
+        )
+
+
+def _invalidate_instance_graphs(workflows, using=None):
+    """Bump the instance graph versions of many workflows, once committed.
+
+    Args:
+        workflows: Content type and primary key pairs of the workflows.
+        using (str): Database alias of the current transaction.
+
+    """
+    cache = get_shared_cache()
+    if cache is not None:
+        keys = []
+        for content_type_id, workflow_pk in workflows:
+            workflow_cls = ContentType.objects.get_for_id(content_type_id).model_class()
+            if workflow_cls is not None:  # skip stale content types
+                keys.append(_get_graph_version_key(workflow_cls, workflow_pk))
+        transaction.on_commit(
+            lambda: _set_many(cache, keys, uuid.uuid4().hex, timeout=None),
+            using=using,
+        )
+
+
+def _set_many(cache, keys, value, timeout):
+    for i in range(0, len(keys), CACHE_BATCH_SIZE):
+        cache.set_many(
+            dict.fromkeys(keys[i : i + CACHE_BATCH_SIZE], value), timeout=timeout
+        )
+
+
+def _delete_many(cache, keys):
+    for i in range(0, len(keys), CACHE_BATCH_SIZE):
+        cache.delete_many(keys[i : i + CACHE_BATCH_SIZE])
+
+
+def _get_cancel_key(task_pk):
+    return f"joeflow:task:{task_pk}:canceled"
+
+
+def _mark_canceled(task_pks, using=None):
+    """Remember canceled tasks for the runners, once the transaction is committed.
+
+    Markers are stored per task, since workflows may be canceled partially.
+    The primary keys may be a lazy iterable, it is consumed in batches once
+    the transaction is committed.
+    """
+    cache = get_shared_cache()
+    if cache is not None:
+
+        def mark():
+            pks = iter(task_pks)
+            while batch := list(itertools.islice(pks, CACHE_BATCH_SIZE)):
+                cache.set_many(
+                    dict.fromkeys(map(_get_cancel_key, batch), True),
+                    timeout=settings.JOEFLOW_CANCEL_MARKER_TIMEOUT,
                 )
-            task.parent_task_set.add(self)
-            if callable(node):
-                transaction.on_commit(task.enqueue)
-            tasks.append(task)
-        return tasks
+
+        transaction.on_commit(mark, using=using)
+
+
+def _unmark_canceled(task_pks, using=None):
+    """Forget canceled tasks that are scheduled again."""
+    cache = get_shared_cache()
+    if cache is not None and task_pks:
+        keys = list(map(_get_cancel_key, task_pks))
+        transaction.on_commit(lambda: _delete_many(cache, keys), using=using)
+
+
+def _update_task_counters(workflow_pk, opened=0, failed=0):
+    """Adjust the open and failed task counters of a workflow in place."""
+    if settings.JOEFLOW_WORKFLOW_COUNTERS:
+        _update_counters(Workflow.objects.filter(pk=workflow_pk), opened, failed)
+
+
+def _update_task_counters_in_bulk(tasks, opened, failed):
+    """Adjust the task counters of all workflows of the given tasks in a single update.
+
+    Must be called before the status of the tasks is changed.
+
+    Args:
+        tasks (TasksQuerySet): Tasks whose status is about to change.
+        opened: Aggregate of the change of open tasks per workflow.
+        failed: Aggregate of the change of failed tasks per workflow.
+
+    """
+    if settings.JOEFLOW_WORKFLOW_COUNTERS:
+        tasks = tasks.order_by()
+        rows = tasks.filter(_workflow=models.OuterRef("pk")).values("_workflow")
+
+        def delta(aggregate):
+            return functions.Coalesce(
+                models.Subquery(rows.annotate(delta=aggregate).values("delta")), 0
+            )
+
+        _update_counters(
+            Workflow.objects.filter(pk__in=tasks.values("_workflow")),
+            delta(opened),
+            delta(failed),
+        )
+
+
+def _update_counters(workflows, opened, failed):
+    # Counters never drop below zero, should they have been enabled
+    # without counting the existing tasks.
+    open_task_count = functions.Greatest(models.F("open_task_count") + opened, 0)
+    failed_task_count = functions.Greatest(models.F("failed_task_count") + failed, 0)
+    workflows.update(
+        # Assigned first, to read the previous counts on all databases.
+        finished=models.ExpressionWrapper(
+            models.Q(
+                models.lookups.Exact(open_task_count, 0),
+                models.lookups.Exact(failed_task_count, 0),
+            ),
+            output_field=models.BooleanField(),
+        ),
+        open_task_count=open_task_count,
+        failed_task_count=failed_task_count,
+        last_activity=Now(),
+    )
+
+
+def get_graph_engine():
+    """Return the engine used to render graphs, either ``dot`` or ``python``."""
+    engine = settings.JOEFLOW_GRAPH_ENGINE
+    if engine is None:
+        engine = "dot" if layout.is_dot_available() else "python"
+    return engine
 
 
 def get_workflows() -> types.GeneratorType:
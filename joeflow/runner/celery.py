@@ -1,16 +1,17 @@
 import logging
 
-from celery import shared_task
+from celery import group, shared_task
 from django.apps import apps
 from django.db import OperationalError, transaction
 
 from joeflow.conf import settings
 from joeflow.contrib.reversion import with_reversion
+from joeflow.runner.locking import WorkflowLocked, lock_workflow
 
 logger = logging.getLogger(__name__)
 
 
-__all__ = ["task_runner"]
+__all__ = ["task_runner", "task_runner_many"]
 
 
 @shared_task(
@@ -22,13 +23,17 @@ __all__ = ["task_runner"]
 )
 def _celery_task_runner(self, task_pk, workflow_pk):
     Task = apps.get_model("joeflow", "Task")
+    if Task.is_canceled(task_pk):
+        logger.info("Task %r has been canceled", task_pk)
+        return
     with transaction.atomic():
         task = Task.objects.select_for_update().get(pk=task_pk, completed=None)
-        workflow = (
-            task.content_type.model_class()
-            .objects.select_for_update(nowait=True)
-            .get(pk=workflow_pk)
-        )
+        try:
+            workflow = lock_workflow(task.content_type.model_class(), workflow_pk)
+        except WorkflowLocked as e:
+            if e.retry_delay is None:
+                raise
+            raise self.retry(exc=e, countdown=e.retry_delay)
 
         try:
             logger.info("Executing %r", task)
@@ -64,3 +69,16 @@ def task_runner(*, task_pk, workflow_pk, countdown, eta):
         eta=eta,
         queue=settings.JOEFLOW_CELERY_QUEUE_NAME,
     )
+
+
+def task_runner_many(tasks, *, countdown=None, eta=None):
+    """Schedule multiple asynchronous machine tasks as a single celery group."""
+    group(
+        _celery_task_runner.signature(
+            (task.pk, task._workflow_id),
+            countdown=countdown,
+            eta=eta,
+            queue=settings.JOEFLOW_CELERY_QUEUE_NAME,
+        )
+        for task in tasks
+    ).apply_async()
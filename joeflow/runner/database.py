@@ -0,0 +1,217 @@
+"""Execute machine tasks with workers that poll the database.
+
+The database runner does not require a message broker. Scheduling a task only
+sets its due time. Workers – started via the ``runjoeflowworker`` management
+command – claim due tasks in batches using ``SELECT … FOR UPDATE SKIP LOCKED``
+and execute them in a thread pool.
+
+A claimed task is leased to a worker for a limited time. Should a worker die
+while executing a task, the task will be claimed by another worker once
+the lease expired.
+"""
+
+import concurrent.futures
+import datetime
+import logging
+import threading
+
+from django.apps import apps
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from ..contrib.reversion import with_reversion
+from .locking import lock_workflow
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["task_runner", "task_runner_many", "Worker"]
+
+
+def _get_due(countdown=None, eta=None):
+    if eta is not None:
+        return eta
+    due = timezone.now()
+    if countdown:
+        due += datetime.timedelta(seconds=countdown)
+    return due
+
+
+def task_runner(*, task_pk, workflow_pk, countdown=None, eta=None):
+    """Schedule machine task for the database workers."""
+    Task = apps.get_model("joeflow", "Task")
+    Task.objects.filter(pk=task_pk).update(due=_get_due(countdown, eta))
+
+
+def task_runner_many(tasks, *, countdown=None, eta=None):
+    """Schedule multiple machine tasks for the database workers at once."""
+    Task = apps.get_model("joeflow", "Task")
+    Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+        due=_get_due(countdown, eta)
+    )
+
+
+class Worker:
+    """Claim and execute due machine tasks.
+
+    Args:
+        threads (int): Number of tasks executed in parallel.
+        batch_size (int): Maximum number of tasks claimed at once.
+        lease (int): Seconds after which a claimed task may be claimed again.
+        retry_delay (int): Seconds until a task that returned ``False``,
+            or could not be locked, is retried.
+
+    """
+
+    def __init__(self, threads=4, batch_size=20, lease=300, retry_delay=10):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.lease = datetime.timedelta(seconds=lease)
+        self.retry_delay = datetime.timedelta(seconds=retry_delay)
+        self.stopped = threading.Event()
+
+    def claim(self):
+        """Lease a batch of due tasks to this worker.
+
+        Returns:
+            list[tuple]: List of task and workflow primary key tuples.
+
+        """
+        Task = apps.get_model("joeflow", "Task")
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(status=Task.SCHEDULED, completed=None, due__lte=now)
+                .order_by("due")
+                .values_list("pk", "_workflow_id")[: self.batch_size]
+            )
+            Task.objects.filter(pk__in=[pk for pk, _ in tasks]).update(
+                due=now + self.lease
+            )
+        return tasks
+
+    def run_once(self):
+        """Claim and execute a single batch of due tasks.
+
+        Returns:
+            int: Number of executed tasks.
+
+        """
+        tasks = self.claim()
+        with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+            for future in concurrent.futures.as_completed(
+                executor.submit(self.execute, task_pk, workflow_pk)
+                for task_pk, workflow_pk in tasks
+            ):
+                future.result()
+        return len(tasks)
+
+    def run(self, interval=1, burst=False):
+        """Execute due tasks until the worker is stopped.
+
+        Args:
+            interval (float): Seconds to wait, if no tasks are due.
+            burst (bool): Stop once no tasks are due.
+
+        """
+        while not self.stopped.is_set():
+            close_old_connections()
+            try:
+                executed = self.run_once()
+            except OperationalError:
+                logger.warning("Tasks could not be claimed, retrying …", exc_info=True)
+                executed = 0
+            if not executed:
+                if burst:
+                    break
+                self.stopped.wait(interval)
+
+    def stop(self):
+        self.stopped.set()
+
+    def execute(self, task_pk, workflow_pk):
+        try:
+            self._execute(task_pk, workflow_pk)
+        except OperationalError as e:
+            logger.info("Task %r could not be locked, retrying …", task_pk)
+            self.retry(task_pk, delay=getattr(e, "retry_delay", None))
+        except Exception:
+            # e.g. invalid next nodes, the worker must keep running
+            logger.exception("Execution of task %r failed", task_pk)
+            self.fail(task_pk)
+        finally:
+            close_old_connections()
+
+    def fail(self, task_pk):
+        """Mark a task as failed, that raised outside of its node."""
+        Task = apps.get_model("joeflow", "Task")
+        try:
+            with transaction.atomic():
+                Task.objects.select_for_update().get(
+                    pk=task_pk, status=Task.SCHEDULED, completed=None
+                ).fail()
+        except Task.DoesNotExist:
+            pass
+        except Exception:
+            logger.exception(
+                "Task %r could not be marked as failed,"
+                " retrying once its lease expired …",
+                task_pk,
+            )
+
+    def retry(self, task_pk, delay=None):
+        Task = apps.get_model("joeflow", "Task")
+        if delay is None:
+            delay = self.retry_delay
+        else:
+            delay = datetime.timedelta(seconds=delay)
+        try:
+            Task.objects.filter(pk=task_pk).update(due=timezone.now() + delay)
+        except OperationalError:
+            logger.warning(
+                "Task %r could not be rescheduled, retrying once its lease expired …",
+                task_pk,
+            )
+
+    def _execute(self, task_pk, workflow_pk):
+        Task = apps.get_model("joeflow", "Task")
+        if Task.is_canceled(task_pk):
+            logger.info("Task %r has been canceled", task_pk)
+            return
+        with transaction.atomic():
+            try:
+                task = Task.objects.select_for_update().get(
+                    pk=task_pk, status=Task.SCHEDULED, completed=None
+                )
+            except Task.DoesNotExist:
+                logger.info("Task %r is no longer scheduled", task_pk)
+                return
+
+            workflow = lock_workflow(task.content_type.model_class(), workflow_pk)
+
+            try:
+                logger.info("Executing %r", task)
+                node = task.node
+                with_task = getattr(node, "with_task", False)
+                kwargs = {}
+                if with_task:
+                    kwargs["task"] = task
+                with with_reversion(task):
+                    result = node(workflow, **kwargs)
+            except OperationalError:
+                raise
+            except:  # NoQA
+                task.fail()
+                logger.exception("Execution of %r failed", task)
+            else:
+                if result is False:
+                    logger.info("%r returned False, retrying …", task)
+                    self.retry(task_pk)
+                    return
+                elif result is True:
+                    result = None
+                logger.info(
+                    "%r completed successfully, starting next tasks: %s", task, result
+                )
+                task.start_next_tasks(next_nodes=result)
+                task.finish()
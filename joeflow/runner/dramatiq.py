@@ -3,24 +3,45 @@ import logging
 import dramatiq
 from django.apps import apps
 from django.db import OperationalError, transaction
+from django.utils import timezone
 
 from ..conf import settings
 from ..contrib.reversion import with_reversion
+from .locking import WorkflowLocked, lock_workflow
 
 logger = logging.getLogger(__name__)
 
 
+def _get_delay(countdown=None, eta=None):
+    """Return the message delay in milliseconds."""
+    if eta is not None:
+        countdown = (eta - timezone.now()).total_seconds()
+    if countdown is not None:
+        return max(int(countdown * 1000), 0)
+
+
 def task_runner(*, task_pk, workflow_pk, countdown=None, eta=None, retries=0):
-    """Schedule asynchronous machine task using celery."""
+    """Schedule asynchronous machine task using dramatiq."""
     _dramatiq_task_runner.send_with_options(
         args=(task_pk, workflow_pk),
-        delay=countdown,
+        delay=_get_delay(countdown, eta),
         retries=retries,
     )
 
 
+def task_runner_many(tasks, *, countdown=None, eta=None):
+    """Schedule multiple asynchronous machine tasks as a single dramatiq group."""
+    dramatiq.group(
+        _dramatiq_task_runner.message_with_options(
+            args=(task.pk, task._workflow_id),
+            retries=0,
+        )
+        for task in tasks
+    ).run(delay=_get_delay(countdown, eta))
+
+
 class RetryError(dramatiq.errors.Retry):
-    """Raised to retry a task if the task result is ``False``."""
+    """Raised to retry a task if the task result is ``False`` or its workflow is locked."""
 
     pass
 
@@ -31,6 +52,9 @@ class RetryError(dramatiq.errors.Retry):
 )
 def _dramatiq_task_runner(task_pk, workflow_pk, retries=0):
     Task = apps.get_model("joeflow", "Task")
+    if Task.is_canceled(task_pk):
+        logger.info("Task %r has been canceled", task_pk)
+        return
     with transaction.atomic():
         task = (
             Task.objects.filter(pk=task_pk, completed=None)
@@ -38,12 +62,12 @@ def _dramatiq_task_runner(task_pk, workflow_pk, retries=0):
             .get()
         )
 
-        workflow = (
-            task.content_type.model_class()
-            .objects.filter(pk=workflow_pk)
-            .select_for_update(nowait=True)
-            .get()
-        )
+        try:
+            workflow = lock_workflow(task.content_type.model_class(), workflow_pk)
+        except WorkflowLocked as e:
+            if e.retry_delay is None:
+                raise
+            raise RetryError(str(e), delay=int(e.retry_delay * 1000)) from e
 
         try:
             logger.info("Executing %r", task)
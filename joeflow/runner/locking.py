@@ -0,0 +1,172 @@
+"""Lock workflows while their machine tasks are executed.
+
+Parallel branches of a workflow may be executed at the same time. All runners
+lock the workflow to serialize them. How the lock is acquired can be configured
+via :attr:`.JOEFLOW_LOCK_STRATEGY` or per workflow via
+:attr:`.Workflow.lock_strategy`:
+
+``nowait``
+    Fail right away, if the workflow is locked. The task is retried with
+    the runner's backoff.
+
+``blocking``
+    Wait up to :attr:`.JOEFLOW_LOCK_TIMEOUT` seconds for the lock, before
+    the task is retried with the runner's backoff. The timeout is only
+    applied on PostgreSQL, other databases use their own lock wait timeout.
+
+``skip_locked``
+    Skip the workflow, if it is locked, and retry the task after
+    :attr:`.JOEFLOW_LOCK_RETRY_DELAY` seconds.
+
+``advisory``
+    Acquire a PostgreSQL transaction level advisory lock keyed by the
+    workflow's content type and primary key, instead of locking the
+    workflow row. Falls back to ``nowait`` on other databases.
+
+Collisions are counted per workflow and strategy in :data:`collisions`,
+successfully acquired locks in :data:`acquisitions`. Both counters are kept per
+process. A :data:`lock_collision` signal is sent for every collision, e.g. to
+forward it to your metrics backend.
+"""
+
+import collections
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connections, router
+from django.dispatch import Signal
+
+from ..conf import settings
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "NOWAIT",
+    "BLOCKING",
+    "SKIP_LOCKED",
+    "ADVISORY",
+    "WorkflowLocked",
+    "lock_workflow",
+    "collisions",
+    "acquisitions",
+    "lock_collision",
+]
+
+NOWAIT = "nowait"
+BLOCKING = "blocking"
+SKIP_LOCKED = "skip_locked"
+ADVISORY = "advisory"
+
+STRATEGIES = (NOWAIT, BLOCKING, SKIP_LOCKED, ADVISORY)
+
+collisions = collections.Counter()
+"""Number of lock collisions by workflow label and strategy."""
+
+acquisitions = collections.Counter()
+"""Number of acquired locks by workflow label and strategy."""
+
+lock_collision = Signal()
+"""Sent with ``workflow_pk`` and ``strategy``, if a workflow is locked."""
+
+
+class WorkflowLocked(OperationalError):
+    """Raised if a workflow is locked by another task.
+
+    Args:
+        retry_delay (float): Seconds after which the task should be retried,
+            ``None`` to use the runner's backoff.
+
+    """
+
+    def __init__(self, workflow_cls, workflow_pk, strategy, retry_delay=None):
+        super().__init__(
+            f"{workflow_cls._meta.label}({workflow_pk}) is locked ({strategy})"
+        )
+        self.workflow_cls = workflow_cls
+        self.workflow_pk = workflow_pk
+        self.strategy = strategy
+        self.retry_delay = retry_delay
+
+
+def get_lock_strategy(workflow_cls):
+    strategy = workflow_cls.lock_strategy or settings.JOEFLOW_LOCK_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ImproperlyConfigured(
+            f"{workflow_cls._meta.label} has an invalid lock strategy {strategy!r},"
+            f" choose one of: {', '.join(STRATEGIES)}"
+        )
+    return strategy
+
+
+def lock_workflow(workflow_cls, workflow_pk):
+    """Lock and return a workflow, must be called within a transaction.
+
+    Raises:
+        WorkflowLocked: If the workflow is locked by another task.
+
+    """
+    strategy = get_lock_strategy(workflow_cls)
+    try:
+        workflow = _lock(workflow_cls, workflow_pk, strategy)
+    except OperationalError as e:
+        raise _collide(workflow_cls, workflow_pk, strategy) from e
+    if workflow is None:
+        raise _collide(workflow_cls, workflow_pk, strategy)
+    acquisitions[workflow_cls._meta.label, strategy] += 1
+    return workflow
+
+
+def _collide(workflow_cls, workflow_pk, strategy):
+    collisions[workflow_cls._meta.label, strategy] += 1
+    logger.info(
+        "%s(%r) is locked (%s)", workflow_cls._meta.label, workflow_pk, strategy
+    )
+    lock_collision.send(sender=workflow_cls, workflow_pk=workflow_pk, strategy=strategy)
+    retry_delay = settings.JOEFLOW_LOCK_RETRY_DELAY if strategy == SKIP_LOCKED else None
+    return WorkflowLocked(workflow_cls, workflow_pk, strategy, retry_delay=retry_delay)
+
+
+def _lock(workflow_cls, workflow_pk, strategy):
+    """Return the locked workflow or ``None``, if it is locked by another task."""
+    queryset = workflow_cls.objects.filter(pk=workflow_pk)
+    connection = connections[router.db_for_write(workflow_cls)]
+    is_postgresql = connection.vendor == "postgresql"
+
+    if strategy == SKIP_LOCKED:
+        workflow = queryset.select_for_update(skip_locked=True).first()
+        if workflow is None:
+            queryset.get()  # raise DoesNotExist, if the workflow is gone
+        return workflow
+
+    if strategy == BLOCKING:
+        if not is_postgresql:
+            return queryset.select_for_update().get()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT current_setting('lock_timeout'),"
+                " set_config('lock_timeout', %s, true)",
+                [f"{int(settings.JOEFLOW_LOCK_TIMEOUT * 1000)}ms"],
+            )
+            (lock_timeout, _) = cursor.fetchone()
+            workflow = queryset.select_for_update().get()
+            cursor.execute(
+                "SELECT set_config('lock_timeout', %s, true)", [lock_timeout]
+            )
+        return workflow
+
+    if strategy == ADVISORY and is_postgresql:
+        content_type = ContentType.objects.get_for_model(
+            workflow_cls, for_concrete_model=False
+        )
+        with connection.cursor() as cursor:
+            # The two key variant only accepts 32-bit integers, larger primary
+            # keys may share a lock, which is safe but causes extra collisions.
+            cursor.execute(
+                "SELECT pg_try_advisory_xact_lock(%s, %s)",
+                [content_type.pk, int(workflow_pk) % 2**31],
+            )
+            (locked,) = cursor.fetchone()
+        return queryset.get() if locked else None
+
+    return queryset.select_for_update(nowait=True).get()
@@ -0,0 +1,145 @@
+"""Execute machine tasks synchronously in the current process.
+
+The synchronous runner executes machine tasks right after the transaction that
+scheduled them has been committed. Tasks scheduled by a running task are queued
+and executed one after another, without growing the call stack.
+
+This is useful for tests as well as short chains of machine tasks, that should
+be completed within a single request.
+"""
+
+import collections
+import contextvars
+import logging
+
+from django.apps import apps
+from django.db import OperationalError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..conf import settings
+from ..contrib.reversion import with_reversion
+from .locking import lock_workflow
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["task_runner"]
+
+_queue = contextvars.ContextVar("joeflow_sync_queue", default=None)
+
+
+def task_runner(*, task_pk, workflow_pk, countdown=None, eta=None):
+    """Execute machine task synchronously once the transaction is committed."""
+    transaction.on_commit(
+        lambda: _sync_task_runner(task_pk, workflow_pk, countdown=countdown, eta=eta)
+    )
+
+
+def _defer(task_pk, workflow_pk, countdown=None, eta=None):
+    """Hand a task that can not be executed right now to the fallback runner."""
+    if settings.JOEFLOW_SYNC_FALLBACK_TASK_RUNNER:
+        task_runner = import_string(settings.JOEFLOW_SYNC_FALLBACK_TASK_RUNNER)
+        task_runner(
+            task_pk=task_pk, workflow_pk=workflow_pk, countdown=countdown, eta=eta
+        )
+    else:
+        logger.warning("Task %r was not executed and remains scheduled", task_pk)
+
+
+def _sync_task_runner(task_pk, workflow_pk, countdown=None, eta=None):
+    if countdown or (eta and eta > timezone.now()):
+        logger.info("Task %r is due later, deferring …", task_pk)
+        _defer(task_pk, workflow_pk, countdown=countdown, eta=eta)
+        return
+
+    queue = _queue.get()
+    if queue is not None:
+        # A task is already being executed, let the outermost call proceed.
+        queue.append((task_pk, workflow_pk))
+        return
+
+    queue = collections.deque([(task_pk, workflow_pk)])
+    token = _queue.set(queue)
+    try:
+        depth = 0
+        while queue:
+            task_pk, workflow_pk = queue.popleft()
+            if depth >= settings.JOEFLOW_SYNC_MAX_DEPTH:
+                logger.warning(
+                    "Maximum depth of %d tasks reached, deferring …",
+                    settings.JOEFLOW_SYNC_MAX_DEPTH,
+                )
+                _defer(task_pk, workflow_pk)
+                continue
+            depth += 1
+            try:
+                _execute(task_pk, workflow_pk)
+            except OperationalError as e:
+                logger.info("Task %r could not be locked, deferring …", task_pk)
+                _defer(task_pk, workflow_pk, countdown=getattr(e, "retry_delay", None))
+            except Exception:
+                # e.g. invalid next nodes, keep executing the queued tasks
+                logger.exception("Execution of task %r failed", task_pk)
+                _fail(task_pk)
+    finally:
+        _queue.reset(token)
+
+
+def _fail(task_pk):
+    """Mark a task as failed, that raised outside of its node."""
+    Task = apps.get_model("joeflow", "Task")
+    try:
+        with transaction.atomic():
+            Task.objects.select_for_update().get(
+                pk=task_pk, status=Task.SCHEDULED, completed=None
+            ).fail()
+    except Task.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception("Task %r could not be marked as failed", task_pk)
+
+
+def _execute(task_pk, workflow_pk):
+    Task = apps.get_model("joeflow", "Task")
+    if Task.is_canceled(task_pk):
+        logger.info("Task %r has been canceled", task_pk)
+        return
+    with transaction.atomic():
+        try:
+            task = (
+                Task.objects.filter(pk=task_pk, completed=None)
+                .select_for_update(nowait=True)
+                .get()
+            )
+        except Task.DoesNotExist:
+            logger.info("Task %r has already been completed", task_pk)
+            return
+
+        workflow = lock_workflow(task.content_type.model_class(), workflow_pk)
+
+        try:
+            logger.info("Executing %r", task)
+            node = task.node
+            with_task = getattr(node, "with_task", False)
+            kwargs = {}
+            if with_task:
+                kwargs["task"] = task
+            with with_reversion(task):
+                result = node(workflow, **kwargs)
+        except OperationalError:
+            raise
+        except:  # NoQA
+            task.fail()
+            logger.exception("Execution of %r failed", task)
+        else:
+            if result is False:
+                logger.info("%r returned False, deferring …", task)
+                transaction.on_commit(lambda: _defer(task_pk, workflow_pk))
+                return
+            elif result is True:
+                result = None
+            logger.info(
+                "%r completed successfully, starting next tasks: %s", task, result
+            )
+            task.start_next_tasks(next_nodes=result)
+            task.finish()
@@ -2,6 +2,7 @@
 
 from collections.abc import Iterable
 
+from django.db import transaction
 from django.utils import timezone
 
 from ..typing import MACHINE
@@ -108,19 +109,42 @@ class Join:
         self.parents = set(parents)
 
     def __call__(self, workflow, task):
-        return set(task.parent_task_set.values_list("name", flat=True)) == self.parents
+        return self.is_ready(task)
+
+    def is_ready(self, task):
+        """Return whether all parent tasks have arrived.
+
+        The join task is only scheduled once, when the last parent arrives.
+        """
+        names = task.parent_task_set.order_by().values_list("name", flat=True)
+        return set(names.distinct()) == self.parents
 
     def create_task(self, workflow, prev_task):
-        return workflow.task_set.get_or_create(
-            name=self.name,
-            type=self.type,
-            completed=None,
-        )[0]
+        # Parents of the same workflow may arrive concurrently, e.g. from
+        # a human task. We lock the workflow to create only a single join task.
+        # Row locks require a transaction, e.g. if called by a start view.
+        with transaction.atomic(using=workflow._state.db):
+            list(
+                type(workflow)
+                ._base_manager.select_for_update()
+                .filter(pk=workflow.pk)
+                .values_list("pk")
+            )
+            task = workflow.task_set.filter(name=self.name, completed=None).first()
+            if task is None:
+                task = workflow.task_set.create(
+                    name=self.name, type=self.type, workflow=workflow
+                )
+        return task
 
 
 class Wait:
     """Wait for a certain amount of time and then continue with the next tasks.
 
+    The task is scheduled to be executed once the duration has passed.
+    Should the task be executed early, e.g. when it is rerun, it will
+    be retried until the duration has passed.
+
     Args:
         duration (datetime.timedelta): Time to wait in time delta from creation of task.
 
@@ -159,3 +183,7 @@ class Wait:
 
     def __call__(self, workflow, task):
         return timezone.now() - task.created >= self.duration
+
+    def get_eta(self, task):
+        """Return the time at which the task should be executed."""
+        return task.created + self.duration
@@ -1,4 +1,8 @@
-from collections import defaultdict
+import hashlib
+import types
+from collections import Counter, defaultdict, namedtuple
+
+from .typing import HUMAN
 
 try:
     import graphviz as gv
@@ -6,6 +10,255 @@ except ImportError:
     gv = type("gv", (), {"Digraph": object})
 
 
+class Topology:
+    """Immutable index of a workflow's nodes and edges.
+
+    The index is compiled once per workflow class. It allows
+    to look up nodes by name as well as their predecessors and
+    successors without scanning all edges. The ``digest`` identifies
+    the edges and node types, e.g. to cache rendered graphs.
+
+    Args:
+        edges (list[tuple]): List of edges, see :attr:`.Workflow.edges`.
+
+    """
+
+    __slots__ = ("edges", "nodes", "successors", "predecessors", "digest")
+
+    def __init__(self, edges=None):
+        nodes = {}
+        successors = defaultdict(list)
+        predecessors = defaultdict(list)
+        for start, end in edges or ():
+            nodes.setdefault(start.name, start)
+            nodes.setdefault(end.name, end)
+            successors[start.name].append(end)
+            predecessors[end.name].append(start)
+        super().__setattr__("edges", tuple(edges or ()))
+        super().__setattr__("nodes", types.MappingProxyType(nodes))
+        super().__setattr__(
+            "successors",
+            types.MappingProxyType({k: tuple(v) for k, v in successors.items()}),
+        )
+        super().__setattr__(
+            "predecessors",
+            types.MappingProxyType({k: tuple(v) for k, v in predecessors.items()}),
+        )
+        super().__setattr__(
+            "digest",
+            hashlib.sha256(
+                repr(
+                    [
+                        (start.name, getattr(start, "type", None), end.name)
+                        for start, end in self.edges
+                    ]
+                    + [
+                        (name, getattr(node, "type", None))
+                        for name, node in nodes.items()
+                    ]
+                ).encode()
+            ).hexdigest(),
+        )
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, name):
+        return name in self.nodes
+
+    def get_next_nodes(self, name):
+        """Return all nodes following the node with the given name."""
+        return self.successors.get(name, ())
+
+    def get_prev_nodes(self, name):
+        """Return all nodes preceding the node with the given name."""
+        return self.predecessors.get(name, ())
+
+    def in_degree(self, name):
+        """Return the number of edges ending in the node with the given name."""
+        return len(self.get_prev_nodes(name))
+
+    def out_degree(self, name):
+        """Return the number of edges starting at the node with the given name."""
+        return len(self.get_next_nodes(name))
+
+
+TaskSummary = namedtuple(
+    "TaskSummary", ["name", "type", "count", "first", "last", "statuses"]
+)
+TaskSummary.__doc__ = """Tasks of a workflow aggregated by name.
+
+Args:
+    count (int): Number of tasks.
+    first (datetime.datetime): Creation time of the first task.
+    last (datetime.datetime): Creation time of the last task.
+    statuses (dict): Number of tasks by status.
+
+"""
+
+
+class InstanceGraph:
+    """Nodes and edges of a workflow instance, independent of the output format.
+
+    All tasks are loaded in a single query, the relations between them in
+    another one. Every node and edge is classified once, serializers only
+    translate the classes into their own styles.
+
+    Nodes carry their type and one of the classes ``inactive``, ``active`` or
+    ``completed``. Tasks not part of the workflow definition are either
+    ``override`` or ``obsolete``. Completed tasks without children are
+    ``final``. Edges are either ``inactive``, ``active`` or ``dashed``.
+
+    Repeated tasks, e.g. loop iterations, are collapsed into a single node,
+    representing the latest task. The number of tasks is kept in
+    ``iterations``.
+
+    If a task summary is given, the graph is aggregated from it instead of
+    loading every task. Aggregated nodes have no links and there are no edges
+    to override or obsolete tasks, since the relations between tasks are not
+    loaded.
+
+    Args:
+        workflow (joeflow.models.Workflow): Workflow instance.
+        summary (dict): Optional task summary by name,
+            see :meth:`.TasksQuerySet.summary`.
+
+    """
+
+    Node = namedtuple(
+        "Node", ["name", "type", "classes", "href", "iterations"], defaults=[0]
+    )
+
+    def __init__(self, workflow, summary=None):
+        self.rankdir = workflow.rankdir
+        self.nodes = {
+            name: self.Node(name, node.type, frozenset({"inactive"}), None)
+            for name, node in workflow.get_nodes()
+        }
+        self.edges = {
+            (start.name, end.name): "inactive" for start, end in workflow.edges
+        }
+        if summary is None:
+            self._add_tasks(workflow)
+        else:
+            self._add_summary(workflow, summary)
+
+    def _add_tasks(self, workflow):
+        tasks, children, parents = self._get_tasks(workflow)
+        names = workflow._topology.nodes.keys()
+        latest = {task.name: task for task in tasks}
+        iterations = Counter(task.name for task in tasks)
+
+        for task in tasks:
+            if task.name not in names:
+                continue
+            if latest[task.name] is task:
+                self._add_node(
+                    task,
+                    task.name,
+                    set(),
+                    children,
+                    href=task.get_absolute_url(),
+                    iterations=iterations[task.name],
+                )
+            for child in children[task.pk]:
+                if child.name != "override":
+                    self.edges[task.name, child.name] = "active"
+
+        for task in tasks:
+            if task.name != "override":
+                continue
+            self._add_node(task, self.get_node_name(task), {"override"}, children)
+            self._add_dashed_edges(task, children, parents)
+
+        for task in tasks:
+            if task.name in names or task.name == "override":
+                continue
+            if latest[task.name] is task:
+                self._add_node(
+                    task,
+                    task.name,
+                    {"obsolete"},
+                    children,
+                    iterations=iterations[task.name],
+                )
+            self._add_dashed_edges(task, children, parents)
+
+    def _add_summary(self, workflow, summary):
+        Task = workflow.task_set.model
+        names = workflow._topology.nodes.keys()
+        for name, task_summary in summary.items():
+            is_open = task_summary.statuses.keys() & {Task.SCHEDULED, Task.FAILED}
+            classes = {"active" if is_open else "completed"}
+            if name == "override":
+                classes.add("override")
+            elif name not in names:
+                classes.add("obsolete")
+            elif "completed" in classes and not any(
+                node.name in summary for node in workflow._topology.get_next_nodes(name)
+            ):
+                classes.add("final")
+            if name == "override":
+                node_type = HUMAN
+            elif name in names:
+                node_type = self.nodes[name].type
+            else:
+                node_type = task_summary.type
+            self.nodes[name] = self.Node(
+                name, node_type, frozenset(classes), None, task_summary.count
+            )
+        for start, end in self.edges:
+            if start in summary and end in summary:
+                self.edges[start, end] = "active"
+
+    @staticmethod
+    def get_node_name(task):
+        """Return the node name of a task, override tasks are unique per task."""
+        if task.name == "override":
+            return f"override_{task.pk}"
+        return task.name
+
+    @staticmethod
+    def _get_tasks(workflow):
+        tasks = {}
+        for task in workflow.task_set.defer("exception", "stacktrace").order_by("pk"):
+            task.workflow = workflow  # avoid resolving the generic relation per task
+            tasks[task.pk] = task
+        children = defaultdict(list)
+        parents = defaultdict(list)
+        through = workflow.task_set.model.parent_task_set.through
+        for child_pk, parent_pk in through.objects.filter(
+            from_task__in=workflow.task_set.values("pk")
+        ).values_list("from_task_id", "to_task_id"):
+            if child_pk not in tasks or parent_pk not in tasks:
+                continue  # created after the tasks have been loaded
+            children[parent_pk].append(tasks[child_pk])
+            parents[child_pk].append(tasks[parent_pk])
+        return list(tasks.values()), children, parents
+
+    def _add_node(self, task, name, classes, children, href=None, iterations=1):
+        classes.add("completed" if task.completed else "active")
+        if task.completed and not children[task.pk]:
+            classes.add("final")
+        node_type = HUMAN if "override" in classes else task.type
+        self.nodes[name] = self.Node(
+            name, node_type, frozenset(classes), href, iterations
+        )
+
+    def _add_dashed_edges(self, task, children, parents):
+        name = self.get_node_name(task)
+        for parent in parents[task.pk]:
+            self.edges[self.get_node_name(parent), name] = "dashed"
+        for child in children[task.pk]:
+            self.edges[name, self.get_node_name(child)] = "dashed"
+
+
 class NoDashDiGraph(gv.Digraph):
     """Like `.graphviz.Digraph` but with unique nodes and edges.
 
@@ -14,11 +267,17 @@ class NoDashDiGraph(gv.Digraph):
     and edges unique by head and tail.
 
     Underscores are replaced with whitespaces from identifiers.
+
+    The DOT statements of nodes and edges are compiled once they are added.
+    Iterating the graph does not alter its state, so that the same graph can be
+    rendered repeatedly. The sorted statements are memoized until the next
+    node or edge is added.
     """
 
     def __init__(self, *args, **kwargs):
-        self._nodes = defaultdict(dict)
-        self._edges = defaultdict(dict)
+        self._nodes = {}
+        self._edges = {}
+        self._lines = None
         super().__init__(*args, **kwargs)
 
     def __iter__(self, subgraph=False):
@@ -41,29 +300,33 @@ class NoDashDiGraph(gv.Digraph):
 
         yield from self.body
 
-        for name, attrs in sorted(self._nodes.items()):
-            name = self._quote(name)
-            label = attrs.pop("label", None)
-            _attributes = attrs.pop("_attributes", None)
-            attr_list = self._attr_list(label, kwargs=attrs, attributes=_attributes)
-            yield self._node(name, attr_list)
-
-        for edge, attrs in sorted(self._edges.items()):
-            tail_name, head_name = edge
-            tail_name = self._quote_edge(tail_name)
-            head_name = self._quote_edge(head_name)
-            label = attrs.pop("label", None)
-            _attributes = attrs.pop("_attributes", None)
-            attr_list = self._attr_list(label, kwargs=attrs, attributes=_attributes)
-            yield self._edge(tail=tail_name, head=head_name, attr=attr_list)
+        if self._lines is None:
+            self._lines = [self._nodes[name] for name in sorted(self._nodes)] + [
+                self._edges[edge] for edge in sorted(self._edges)
+            ]
+        yield from self._lines
 
         yield self._tail
 
-    def node(self, name, **attrs):
-        self._nodes[name] = attrs
+    def node(self, name, label=None, _attributes=None, **attrs):
+        attr_list = self._attr_list(label, kwargs=attrs, attributes=_attributes)
+        self._nodes[name] = self._node(self._quote(name), attr_list)
+        self._lines = None
+
+    def edge(self, tail_name, head_name, label=None, _attributes=None, **attrs):
+        attr_list = self._attr_list(label, kwargs=attrs, attributes=_attributes)
+        self._edges[(tail_name, head_name)] = self._edge(
+            tail=self._quote_edge(tail_name),
+            head=self._quote_edge(head_name),
+            attr=attr_list,
+        )
+        self._lines = None
 
-    def edge(self, tail_name, head_name, **attrs):
-        self._edges[(tail_name, head_name)] = attrs
+    def clear(self, keep_attrs=False):
+        super().clear(keep_attrs=keep_attrs)
+        self._nodes.clear()
+        self._edges.clear()
+        self._lines = None
 
     @staticmethod
     def _quote(identifier, *args, **kwargs):
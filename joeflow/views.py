@@ -1,4 +1,5 @@
-from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.exceptions import BadRequest
 from django.db import transaction
 from django.forms import modelform_factory
 from django.shortcuts import get_object_or_404
@@ -131,3 +132,36 @@ class OverrideView(
         response = super().form_valid(form)
         form.start_next_tasks(self.request.user)
         return response
+
+
+class InboxView(LoginRequiredMixin, generic.ListView):
+    """List open human tasks assigned to the current user, newest first.
+
+    Pages are selected by the ``after`` query parameter, the primary key of
+    the last task of the previous page, see :meth:`.TasksQuerySet.inbox`.
+    The context provides ``next_after`` for the next page, if there is one.
+    """
+
+    page_size = 20
+    template_name = "joeflow/task_inbox.html"
+    context_object_name = "task_list"
+
+    def get_queryset(self):
+        after = self.request.GET.get("after")
+        if after is not None:
+            try:
+                after = int(after)
+            except ValueError as e:
+                raise BadRequest("Invalid page.") from e
+        return models.Task.objects.inbox(self.request.user, after=after)[
+            : self.page_size + 1
+        ]
+
+    def get_context_data(self, **kwargs):
+        tasks = list(self.object_list)
+        next_after = (
+            tasks[self.page_size - 1].pk if len(tasks) > self.page_size else None
+        )
+        return super().get_context_data(
+            object_list=tasks[: self.page_size], next_after=next_after, **kwargs
+        )
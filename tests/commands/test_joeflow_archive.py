@@ -0,0 +1,86 @@
+import datetime
+import gzip
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from joeflow.models import Task
+
+from tests.testapp import workflows
+
+
+@pytest.fixture
+def finished_workflow(db):
+    workflow = workflows.SimpleWorkflow.objects.create()
+    start = workflow.task_set.create(name="start_method")
+    start.finish()
+    end = workflow.task_set.create(name="end")
+    end.parent_task_set.add(start)
+    end.finish()
+    workflow.task_set.update(completed=timezone.now() - datetime.timedelta(days=100))
+    return workflow
+
+
+def test_call(finished_workflow, admin_user, tmp_path):
+    running = workflows.SimpleWorkflow.start_method()
+    recent = workflows.SimpleWorkflow.objects.create()
+    recent.task_set.create(name="start_method").finish()
+    finished_workflow.task_set.get(name="end").assignees.add(admin_user)
+
+    output = tmp_path / "tasks.jsonl.gz"
+    call_command("joeflow_archive", str(output), "--batch-size", "1")
+
+    with gzip.open(output, "rt") as fp:
+        tasks = [json.loads(line) for line in fp]
+    assert [task["name"] for task in tasks] == ["start_method", "end"]
+    assert tasks[1]["parent_task_set"] == [tasks[0]["id"]]
+    assert tasks[1]["assignees"] == [admin_user.pk]
+    assert tasks[1]["workflow_id"] == finished_workflow.pk
+
+    assert not finished_workflow.task_set.exists()
+    assert not Task.parent_task_set.through.objects.filter(
+        to_task_id=tasks[0]["id"]
+    ).exists()
+    assert not Task.assignees.through.objects.exists()
+    assert running.task_set.count() == 2
+    assert recent.task_set.count() == 1
+
+
+def test_call__batches(finished_workflow, tmp_path):
+    other = workflows.SimpleWorkflow.objects.create()
+    other.task_set.create(name="start_method").finish()
+    other.task_set.update(completed=timezone.now() - datetime.timedelta(days=100))
+    output = tmp_path / "tasks.jsonl.gz"
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("joeflow_archive", str(output), "--batch-size", "1")
+    # finished workflows are aggregated only once
+    assert sum('MAX("joeflow_task"."completed")' in q["sql"] for q in ctx) == 1
+    assert not Task.objects.exists()
+
+
+def test_call__keep(finished_workflow, tmp_path):
+    output = tmp_path / "tasks.jsonl.gz"
+    call_command("joeflow_archive", str(output), "--keep")
+    call_command("joeflow_archive", str(output), "--before", "2000-01-01")
+    with gzip.open(output, "rt") as fp:
+        assert len(fp.readlines()) == 2
+    assert finished_workflow.task_set.count() == 2
+
+
+def test_call__before(finished_workflow, tmp_path):
+    output = tmp_path / "tasks.jsonl.gz"
+    call_command("joeflow_archive", str(output), "--before", "2000-01-01T00:00:00")
+    assert finished_workflow.task_set.count() == 2
+    call_command("joeflow_archive", str(output), "--days", "99")
+    assert not finished_workflow.task_set.exists()
+
+
+def test_call__invalid(db, tmp_path):
+    output = str(tmp_path / "tasks.jsonl.gz")
+    with pytest.raises(CommandError):
+        call_command("joeflow_archive", output, "--before", "yesterday")
+    with pytest.raises(CommandError):
+        call_command("joeflow_archive", output, "--batch-size", "0")
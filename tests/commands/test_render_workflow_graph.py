@@ -1,13 +1,20 @@
+import io
 import os
 import tempfile
 from pathlib import Path
 
 import pytest
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from joeflow import layout
 
 pytest.importorskip("graphviz")
 
+requires_dot = pytest.mark.skipif(
+    not layout.is_dot_available(), reason="Graphviz' dot executable is not installed"
+)
 
+
+@requires_dot
 def test_call_no_args():
     tmp_dir = Path(tempfile.mkdtemp())
     call_command("render_workflow_graph", "-d", tmp_dir)
@@ -22,12 +29,14 @@ def test_call_cleanup():
     assert not os.path.exists(str(tmp_dir / "testapp_simpleworkflow"))
 
 
+@requires_dot
 def test_call_format_pdf():
     tmp_dir = Path(tempfile.mkdtemp())
     call_command("render_workflow_graph", "-d", tmp_dir, "-f", "pdf")
     assert os.path.exists(str(tmp_dir / "testapp_simpleworkflow.pdf"))
 
 
+@requires_dot
 def test_call_format_png():
     tmp_dir = Path(tempfile.mkdtemp())
     call_command("render_workflow_graph", "-d", tmp_dir, "-f", "png")
@@ -56,3 +65,94 @@ def test_call_explicit_workflow_invalid():
     assert not os.path.exists(str(tmp_dir / "testapp_simpleworkflow.svg"))
     assert not os.path.exists(str(tmp_dir / "auth_user.svg"))
     assert os.path.exists(str(tmp_dir / "testapp_splitjoinworkflow.svg"))
+
+
+def test_call_no_dot(monkeypatch):
+    monkeypatch.setattr(layout, "is_dot_available", lambda: False)
+    tmp_dir = Path(tempfile.mkdtemp())
+    call_command("render_workflow_graph", "-d", tmp_dir)
+    with open(str(tmp_dir / "testapp_simpleworkflow.svg")) as fp:
+        assert fp.read().startswith("<svg")
+
+
+@pytest.mark.parametrize("args", [("-f", "pdf"), ("-e", "dot")])
+def test_call_no_dot__error(monkeypatch, args):
+    monkeypatch.setattr(layout, "is_dot_available", lambda: False)
+    with pytest.raises(CommandError, match="dot executable"):
+        call_command("render_workflow_graph", "-d", tempfile.mkdtemp(), *args)
+
+
+def test_call_engine_python():
+    tmp_dir = Path(tempfile.mkdtemp())
+    call_command("render_workflow_graph", "-d", tmp_dir, "-e", "python")
+    with open(str(tmp_dir / "testapp_simpleworkflow.svg")) as fp:
+        assert fp.read().startswith("<svg")
+    assert not os.path.exists(str(tmp_dir / "testapp_simpleworkflow"))
+
+
+def test_call_engine_python_format_pdf():
+    tmp_dir = Path(tempfile.mkdtemp())
+    with pytest.raises(CommandError):
+        call_command(
+            "render_workflow_graph", "-d", tmp_dir, "-e", "python", "-f", "pdf"
+        )
+
+
+def test_call_jobs():
+    tmp_dir = Path(tempfile.mkdtemp())
+    stdout = io.StringIO()
+    call_command(
+        "render_workflow_graph", "-d", tmp_dir, "-e", "python", "-j", "4", stdout=stdout
+    )
+    assert os.path.exists(str(tmp_dir / "testapp_simpleworkflow.svg"))
+    assert os.path.exists(str(tmp_dir / "testapp_splitjoinworkflow.svg"))
+    assert "Rendered graph for 'testapp.simpleworkflow' in " in stdout.getvalue()
+
+
+def test_call_jobs_invalid():
+    with pytest.raises(CommandError):
+        call_command("render_workflow_graph", "-e", "python", "-j", "0")
+
+
+def test_call_incremental():
+    tmp_dir = Path(tempfile.mkdtemp())
+    path = tmp_dir / "testapp_simpleworkflow.svg"
+    call_command(
+        "render_workflow_graph",
+        "-d",
+        tmp_dir,
+        "-e",
+        "python",
+        "-i",
+        "testapp.simpleworkflow",
+    )
+    assert path.exists()
+    assert (tmp_dir / "testapp_simpleworkflow.svg.sha256").exists()
+
+    path.write_text("cached")
+    stdout = io.StringIO()
+    call_command(
+        "render_workflow_graph",
+        "-d",
+        tmp_dir,
+        "-e",
+        "python",
+        "-i",
+        "testapp.simpleworkflow",
+        stdout=stdout,
+    )
+    assert path.read_text() == "cached"
+    assert "Skipped graph for 'testapp.simpleworkflow'" in stdout.getvalue()
+
+    (tmp_dir / "testapp_simpleworkflow.svg.sha256").write_text("outdated")
+    os.utime(path, (0, 0))
+    call_command(
+        "render_workflow_graph",
+        "-d",
+        tmp_dir,
+        "-e",
+        "python",
+        "-i",
+        "testapp.simpleworkflow",
+    )
+    assert path.read_text().startswith("<svg")
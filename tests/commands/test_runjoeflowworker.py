@@ -0,0 +1,14 @@
+from django.core.management import call_command
+from joeflow.runner import database
+
+from tests.testapp import workflows
+
+
+def test_call(transactional_db, settings):
+    settings.JOEFLOW_TASK_RUNNER = "joeflow.runner.database.task_runner"
+    wf = workflows.SplitJoinWorkflow.objects.create()
+    task = wf.task_set.create(name="split")
+    database.task_runner(task_pk=task.pk, workflow_pk=wf.pk)
+    call_command("runjoeflowworker", "--burst", "--threads", "1", "--retry-delay", "0")
+    wf.refresh_from_db()
+    assert wf.parallel_task_value == 2
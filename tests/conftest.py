@@ -3,6 +3,24 @@ import pathlib
 from unittest import mock
 
 import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+
+
+@pytest.fixture()
+def shared_cache(settings, tmp_path):
+    """Use a cache that is shared between processes, like Redis or Memcached."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
 
 
 @pytest.fixture()
@@ -16,7 +34,12 @@ def fixturedir(testdir):
 
 
 @pytest.fixture(
-    params=["joeflow.runner.dramatiq.task_runner", "joeflow.runner.celery.task_runner"]
+    params=[
+        "joeflow.runner.dramatiq.task_runner",
+        "joeflow.runner.celery.task_runner",
+        "joeflow.runner.sync.task_runner",
+        "joeflow.runner.database.task_runner",
+    ]
 )
 def _runner(request, monkeypatch, settings):
     settings.JOEFLOW_TASK_RUNNER = request.param
@@ -34,8 +57,20 @@ def _runner(request, monkeypatch, settings):
 
 @pytest.fixture()
 def stub_worker(monkeypatch, settings, _runner):
-    if settings.JOEFLOW_TASK_RUNNER == "joeflow.runner.celery.task_runner":
+    if settings.JOEFLOW_TASK_RUNNER in (
+        "joeflow.runner.celery.task_runner",
+        "joeflow.runner.sync.task_runner",
+    ):
         yield mock.Mock()
+    elif settings.JOEFLOW_TASK_RUNNER == "joeflow.runner.database.task_runner":
+        from joeflow.runner.database import Worker
+
+        class Meta:
+            @staticmethod
+            def wait():
+                Worker(threads=1, retry_delay=0).run(burst=True)
+
+        yield Meta
     else:
         import dramatiq
 
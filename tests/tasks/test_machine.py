@@ -1,5 +1,7 @@
 from datetime import timedelta
+from unittest import mock
 
+from django.db import connection
 from django.utils import timezone
 from joeflow import tasks
 from joeflow.models import Task
@@ -41,6 +43,41 @@ class TestJoin:
         obj3 = node.create_task(wf, None)
         assert obj != obj3
 
+    def test_create_task__autocommit(self, transactional_db):
+        wf = workflows.SimpleWorkflow.objects.create()
+        node = tasks.Join()
+        node.name = "test"
+        node.type = "machine"
+        manager = type(wf)._base_manager
+        select_for_update = manager.select_for_update
+
+        def side_effect(*args, **kwargs):
+            # locking rows outside a transaction fails on e.g. PostgreSQL
+            assert connection.in_atomic_block
+            return select_for_update(*args, **kwargs)
+
+        with mock.patch.object(manager, "select_for_update", side_effect=side_effect):
+            obj = node.create_task(wf, None)
+        assert obj == node.create_task(wf, None)
+
+    def test_start_next_tasks(self, db, settings, django_capture_on_commit_callbacks):
+        settings.JOEFLOW_CACHE = None  # only capture task runner callbacks
+        wf = workflows.SplitJoinWorkflow.objects.create()
+        batman = wf.task_set.create(name="batman")
+        robin = wf.task_set.create(name="robin")
+        with django_capture_on_commit_callbacks() as callbacks:
+            (join,) = batman.start_next_tasks()
+        assert not callbacks
+        assert not workflows.SplitJoinWorkflow.join.is_ready(join)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            (join2,) = robin.start_next_tasks()
+        assert join == join2
+        assert workflows.SplitJoinWorkflow.join.is_ready(join)
+        (callback,) = callbacks
+        assert callback.args == ([join2],)
+        assert wf.task_set.filter(name="join").count() == 1
+
 
 class TestWait:
     def test_call(self):
@@ -52,3 +89,20 @@ class TestWait:
         task.created -= timedelta(seconds=3)
         task_func = tasks.Wait(timedelta(seconds=3))
         assert task_func(None, task)
+
+    def test_get_eta(self):
+        created = timezone.now()
+        task = Task(created=created)
+        task_func = tasks.Wait(timedelta(hours=3))
+        assert task_func.get_eta(task) == created + timedelta(hours=3)
+
+    def test_start_next_tasks(self, db, settings, django_capture_on_commit_callbacks):
+        settings.JOEFLOW_CACHE = None  # only capture task runner callbacks
+        wf = workflows.WaitWorkflow.objects.create()
+        start = wf.task_set.create(name="start")
+        start.workflow = wf
+        with django_capture_on_commit_callbacks() as callbacks:
+            (task,) = start.start_next_tasks()
+        assert task.name == "wait"
+        (callback,) = callbacks
+        assert callback.keywords == {"eta": task.created + timedelta(hours=3)}
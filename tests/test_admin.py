@@ -5,6 +5,8 @@ from django.contrib.admin import site
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from joeflow import admin
 from joeflow.admin import WorkflowAdmin
@@ -75,6 +77,25 @@ class TestTaskAdmin:
         task.refresh_from_db()
         assert task.status == Task.SUCCEEDED
 
+    def test_changelist(self, db, admin_client):
+        workflows.SimpleWorkflow.start_method()
+        with CaptureQueriesContext(connection) as ctx:
+            response = admin_client.get(reverse("admin:joeflow_task_changelist"))
+        assert response.status_code == 200
+        # no column renders the workflow
+        assert not any("testapp_simpleworkflowstate" in q["sql"] for q in ctx)
+
+    def test_pretty_stacktrace(self, db, settings):
+        settings.JOEFLOW_STACKTRACE_SHARED = True
+        settings.JOEFLOW_STACKTRACE_COMPRESS = True
+        task = workflows.SimpleWorkflow.objects.create().task_set.create()
+        try:
+            raise OSError("<nope>")
+        except OSError:
+            task.fail()
+        html = admin.TaskAdmin(Task, site).pretty_stacktrace(task)
+        assert "OSError: &lt;nope&gt;" in html
+
 
 class TestWorkflowAdmin:
     def test_changelist(self, db, admin_client):
@@ -88,6 +109,9 @@ class TestWorkflowAdmin:
             reverse("admin:testapp_simpleworkflow_change", args=[wf.pk])
         )
         assert response.status_code == 200
+        assert "<td>save_the_princess</td><td>1</td><td>scheduled: 1</td>" in (
+            response.content.decode()
+        )
 
     def test_save_model(self, db, rf):
         wf = workflows.SimpleWorkflow.start_method()
@@ -0,0 +1,28 @@
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from joeflow.models import get_workflows
+from joeflow.utils import NoDashDiGraph
+
+pytest.importorskip("graphviz")
+
+
+class TestJoeflowConfig:
+    def test_ready__warm_graph_cache(self, monkeypatch, settings):
+        settings.JOEFLOW_WARM_GRAPH_CACHE = True
+        settings.JOEFLOW_GRAPH_ENGINE = "dot"
+        pipe = mock.Mock(return_value="<svg></svg>")
+        monkeypatch.setattr(NoDashDiGraph, "pipe", pipe)
+        apps.get_app_config("joeflow").ready()
+        assert pipe.call_count == len(list(get_workflows()))
+        for workflow in get_workflows():
+            workflow.get_graph_svg()
+        assert pipe.call_count == len(list(get_workflows()))
+
+    def test_ready__warm_graph_cache__error(self, monkeypatch, settings, caplog):
+        settings.JOEFLOW_WARM_GRAPH_CACHE = True
+        settings.JOEFLOW_GRAPH_ENGINE = "dot"
+        monkeypatch.setattr(NoDashDiGraph, "pipe", mock.Mock(side_effect=OSError))
+        apps.get_app_config("joeflow").ready()
+        assert "Could not render the graph of" in caplog.text
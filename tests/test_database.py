@@ -0,0 +1,116 @@
+import datetime
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+from joeflow.models import Task
+from joeflow.runner import database, locking
+
+from tests.testapp import workflows
+
+
+@pytest.fixture(autouse=True)
+def database_runner(settings):
+    settings.JOEFLOW_TASK_RUNNER = "joeflow.runner.database.task_runner"
+
+
+class TestTaskRunner:
+    def test_task_runner(self, db):
+        wf = workflows.SimpleWorkflow.objects.create()
+        task = wf.task_set.create(name="end")
+        database.task_runner(task_pk=task.pk, workflow_pk=wf.pk)
+        task.refresh_from_db()
+        assert task.due <= timezone.now()
+
+    def test_task_runner__countdown(self, db):
+        wf = workflows.SimpleWorkflow.objects.create()
+        task = wf.task_set.create(name="end")
+        database.task_runner(task_pk=task.pk, workflow_pk=wf.pk, countdown=60)
+        task.refresh_from_db()
+        assert task.due > timezone.now() + datetime.timedelta(seconds=50)
+
+    def test_task_runner_many(self, db):
+        wf = workflows.SimpleWorkflow.objects.create()
+        eta = timezone.now() + datetime.timedelta(hours=1)
+        tasks = [wf.task_set.create(name="end"), wf.task_set.create(name="end")]
+        database.task_runner_many(tasks, eta=eta)
+        assert set(wf.task_set.values_list("due", flat=True)) == {eta}
+
+
+class TestWorker:
+    def test_claim(self, db):
+        wf = workflows.SimpleWorkflow.objects.create()
+        now = timezone.now()
+        later = wf.task_set.create(name="end", due=now - datetime.timedelta(hours=1))
+        first = wf.task_set.create(name="end", due=now - datetime.timedelta(hours=2))
+        wf.task_set.create(name="end", due=now + datetime.timedelta(hours=1))
+        wf.task_set.create(name="end")
+        wf.task_set.create(name="end", due=now, status=Task.FAILED)
+
+        worker = database.Worker(batch_size=1, lease=60)
+        assert worker.claim() == [(first.pk, wf.pk)]
+        first.refresh_from_db()
+        assert first.due > now
+        assert worker.claim() == [(later.pk, wf.pk)]
+        assert worker.claim() == []
+
+    def test_run(self, transactional_db):
+        wf = workflows.SplitJoinWorkflow.objects.create()
+        task = wf.task_set.create(name="split")
+        database.task_runner(task_pk=task.pk, workflow_pk=wf.pk)
+        database.Worker(threads=1).run(burst=True)
+        wf.refresh_from_db()
+        assert wf.parallel_task_value == 2
+        assert wf.task_set.get(name="join").status == Task.SUCCEEDED
+
+    def test_run__false(self, transactional_db):
+        wf = workflows.WaitWorkflow.objects.create()
+        task = wf.task_set.create(name="wait")
+        database.task_runner(task_pk=task.pk, workflow_pk=wf.pk)
+        assert database.Worker(retry_delay=60).run_once() == 1
+        task.refresh_from_db()
+        assert task.status == Task.SCHEDULED
+        assert task.due > timezone.now() + datetime.timedelta(seconds=50)
+
+    def test_run__fail(self, transactional_db):
+        wf = workflows.FailingWorkflow.objects.create()
+        task = wf.task_set.create(name="fail")
+        database.task_runner(task_pk=task.pk, workflow_pk=wf.pk)
+        assert database.Worker().run_once() == 1
+        task.refresh_from_db()
+        assert task.status == Task.FAILED
+        assert task.exception == "ValueError: Boom!"
+
+    def test_run__error(self, transactional_db):
+        task = workflows.SimpleWorkflow.objects.create().task_set.create(name="end")
+        other = workflows.SimpleWorkflow.objects.create().task_set.create(name="end")
+        database.task_runner_many([task, other])
+        start_next_tasks = Task.start_next_tasks
+
+        def side_effect(self, next_nodes=None):
+            if self.pk == task.pk:
+                raise ValueError("Boom!")
+            return start_next_tasks(self, next_nodes)
+
+        with mock.patch.object(
+            Task, "start_next_tasks", autospec=True, side_effect=side_effect
+        ):
+            database.Worker(threads=1).run(burst=True)
+        task.refresh_from_db()
+        assert task.status == Task.FAILED
+        assert task.exception == "ValueError: Boom!"
+        other.refresh_from_db()
+        assert other.status == Task.SUCCEEDED
+
+    def test_run__locked(self, transactional_db, settings):
+        settings.JOEFLOW_LOCK_STRATEGY = "skip_locked"
+        settings.JOEFLOW_LOCK_RETRY_DELAY = 30
+        wf = workflows.SimpleWorkflow.objects.create()
+        task = wf.task_set.create(name="end")
+        database.task_runner(task_pk=task.pk, workflow_pk=wf.pk)
+        with mock.patch.object(locking, "_lock", return_value=None):
+            assert database.Worker(retry_delay=60).run_once() == 1
+        task.refresh_from_db()
+        assert task.status == Task.SCHEDULED
+        now = timezone.now()
+        assert now < task.due < now + datetime.timedelta(seconds=31)
@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+dramatiq = pytest.importorskip("joeflow.runner.dramatiq")
+
+
+def test_get_delay():
+    assert dramatiq._get_delay() is None
+    assert dramatiq._get_delay(countdown=3) == 3000
+    assert dramatiq._get_delay(countdown=-3) == 0
+    delay = dramatiq._get_delay(eta=timezone.now() + timedelta(hours=1))
+    assert 3590000 < delay <= 3600000
+    assert dramatiq._get_delay(eta=timezone.now() - timedelta(hours=1)) == 0
@@ -0,0 +1,87 @@
+from joeflow.layout import Layout, render_svg
+from joeflow.utils import InstanceGraph
+
+from tests.testapp import workflows
+
+
+def get_graph(workflow):
+    nodes = {
+        name: InstanceGraph.Node(name, node.type, frozenset(), None)
+        for name, node in workflow.get_nodes()
+    }
+    edges = {(start.name, end.name): "active" for start, end in workflow.edges}
+    return nodes, edges
+
+
+class TestLayout:
+    def test_layers(self):
+        nodes, edges = get_graph(workflows.SplitJoinWorkflow)
+        layout = Layout(nodes, edges)
+        assert layout.layers == [["start"], ["split"], ["batman", "robin"], ["join"]]
+        assert layout.count_crossings() == 0
+        assert not layout.back_edges
+
+    def test_coordinates(self):
+        nodes, edges = get_graph(workflows.SplitJoinWorkflow)
+        layout = Layout(nodes, edges)
+        x, y = layout.coordinates["split"]
+        batman, robin = layout.coordinates["batman"], layout.coordinates["robin"]
+        assert x < batman[0] == robin[0] < layout.coordinates["join"][0]
+        assert batman[1] < y < robin[1]
+        assert robin[1] - batman[1] >= layout.sizes["robin"][1]
+        assert 0 < x < layout.width
+        assert 0 < robin[1] < layout.height
+
+    def test_coordinates__rankdir(self):
+        nodes, edges = get_graph(workflows.SplitJoinWorkflow)
+        layout = Layout(nodes, edges, rankdir="TD")
+        assert layout.coordinates["start"][1] < layout.coordinates["join"][1]
+        layout = Layout(nodes, edges, rankdir="RL")
+        assert layout.coordinates["start"][0] > layout.coordinates["join"][0]
+
+    def test_back_edges(self):
+        nodes, edges = get_graph(workflows.LoopWorkflow)
+        layout = Layout(nodes, edges)
+        assert layout.back_edges == {("is_counter_10", "increment_counter")}
+        assert list(layout.layers) == [
+            ["start"],
+            ["increment_counter"],
+            ["is_counter_10"],
+            ["end"],
+        ]
+        ((edge, points, curve),) = [
+            route for route in layout.routes if route[0] in layout.back_edges
+        ]
+        assert curve
+        assert points[0][0] == layout.coordinates["is_counter_10"][0]
+        assert points[-1][0] == layout.coordinates["increment_counter"][0]
+
+    def test_long_edges(self):
+        layout = Layout(["a", "b", "c"], [("a", "b"), ("b", "c"), ("a", "c")])
+        assert layout.layers == [["a"], ["b", 0], ["c"]]
+        (points,) = [p for edge, p, _ in layout.routes if edge == ("a", "c")]
+        assert len(points) == 3
+
+    def test_loop(self):
+        layout = Layout(["a"], [("a", "a")])
+        ((edge, points, curve),) = layout.routes
+        assert curve
+        assert all(y < layout.coordinates["a"][1] for x, y in points)
+        assert all(y >= 0 for x, y in points)
+
+
+def test_render_svg():
+    nodes, edges = get_graph(workflows.SimpleWorkflow)
+    nodes["save_the_princess"] = nodes["save_the_princess"]._replace(
+        classes=frozenset({"active"}), href="/princess/?a=1&b=2"
+    )
+    nodes["end"] = nodes["end"]._replace(classes=frozenset({"inactive"}))
+    edges["save_the_princess", "end"] = "inactive"
+    svg = render_svg(nodes, edges)
+    assert svg.startswith('<svg xmlns="http://www.w3.org/2000/svg"')
+    assert svg.endswith("</svg>")
+    assert '<a href="/princess/?a=1&amp;b=2">' in svg
+    assert "<title>save the princess</title>" in svg
+    assert "<title>start_view-&gt;save_the_princess</title>" in svg
+    assert 'stroke="#888888"' in svg
+    assert 'rx="8"' in svg
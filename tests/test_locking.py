@@ -0,0 +1,78 @@
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, transaction
+from joeflow.runner import locking
+
+from tests.testapp import workflows
+
+
+@pytest.fixture(autouse=True)
+def counters():
+    locking.collisions.clear()
+    locking.acquisitions.clear()
+
+
+def test_lock_workflow(db):
+    wf = workflows.SimpleWorkflow.objects.create()
+    with transaction.atomic():
+        assert locking.lock_workflow(workflows.SimpleWorkflow, wf.pk) == wf
+    assert locking.acquisitions == {("testapp.SimpleWorkflow", "nowait"): 1}
+    assert not locking.collisions
+
+
+@pytest.mark.parametrize("strategy", locking.STRATEGIES)
+def test_lock_workflow__strategy(db, settings, strategy):
+    settings.JOEFLOW_LOCK_STRATEGY = strategy
+    wf = workflows.SimpleWorkflow.objects.create()
+    with transaction.atomic():
+        assert locking.lock_workflow(workflows.SimpleWorkflow, wf.pk) == wf
+    assert locking.acquisitions == {("testapp.SimpleWorkflow", strategy): 1}
+
+
+def test_lock_workflow__does_not_exist(db, settings):
+    settings.JOEFLOW_LOCK_STRATEGY = locking.SKIP_LOCKED
+    with pytest.raises(workflows.SimpleWorkflow.DoesNotExist):
+        with transaction.atomic():
+            locking.lock_workflow(workflows.SimpleWorkflow, 1)
+    assert not locking.collisions
+
+
+def test_lock_workflow__nowait(db):
+    wf = workflows.SimpleWorkflow.objects.create()
+    with mock.patch.object(locking, "_lock", side_effect=OperationalError):
+        with pytest.raises(locking.WorkflowLocked) as exc_info:
+            locking.lock_workflow(workflows.SimpleWorkflow, wf.pk)
+    assert exc_info.value.retry_delay is None
+    assert isinstance(exc_info.value.__cause__, OperationalError)
+    assert locking.collisions == {("testapp.SimpleWorkflow", "nowait"): 1}
+
+
+def test_lock_workflow__skip_locked(db, monkeypatch, settings):
+    settings.JOEFLOW_LOCK_RETRY_DELAY = 3
+    monkeypatch.setattr(workflows.SimpleWorkflow, "lock_strategy", "skip_locked")
+    wf = workflows.SimpleWorkflow.objects.create()
+    receiver = mock.Mock()
+    locking.lock_collision.connect(receiver, sender=workflows.SimpleWorkflow)
+    try:
+        with mock.patch.object(locking, "_lock", return_value=None):
+            with pytest.raises(locking.WorkflowLocked) as exc_info:
+                locking.lock_workflow(workflows.SimpleWorkflow, wf.pk)
+    finally:
+        locking.lock_collision.disconnect(receiver, sender=workflows.SimpleWorkflow)
+    assert exc_info.value.retry_delay == 3
+    assert locking.collisions == {("testapp.SimpleWorkflow", "skip_locked"): 1}
+    receiver.assert_called_once_with(
+        signal=locking.lock_collision,
+        sender=workflows.SimpleWorkflow,
+        workflow_pk=wf.pk,
+        strategy="skip_locked",
+    )
+
+
+def test_lock_workflow__invalid(db, settings):
+    settings.JOEFLOW_LOCK_STRATEGY = "optimistic"
+    with pytest.raises(ImproperlyConfigured) as exc_info:
+        locking.lock_workflow(workflows.SimpleWorkflow, 1)
+    assert "invalid lock strategy 'optimistic'" in str(exc_info.value)
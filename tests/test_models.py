@@ -1,10 +1,20 @@
+from unittest import mock
+
 import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_save
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import SafeString
-from joeflow.models import Task, Workflow
+from joeflow import (
+    layout,
+    models as joeflow_models,
+)
+from joeflow.models import Stacktrace, Task, Workflow
 from joeflow.tasks import HUMAN, MACHINE, StartView
+from joeflow.utils import NoDashDiGraph
 
 from tests.testapp import models, workflows
 
@@ -28,6 +38,36 @@ class TestWorkflowBase:
         with pytest.raises(AttributeError):
             workflows.TestWorkflow.not_a_node.workflow_cls
 
+    def test_topology(self):
+        topology = workflows.SplitJoinWorkflow._topology
+        assert list(topology.nodes) == ["start", "split", "batman", "robin", "join"]
+        assert topology.get_next_nodes("split") == (
+            workflows.SplitJoinWorkflow.batman,
+            workflows.SplitJoinWorkflow.robin,
+        )
+        assert topology.get_prev_nodes("join") == (
+            workflows.SplitJoinWorkflow.batman,
+            workflows.SplitJoinWorkflow.robin,
+        )
+        assert topology.get_next_nodes("join") == ()
+        assert topology.out_degree("split") == 2
+        assert topology.in_degree("join") == 2
+        assert topology.in_degree("start") == 0
+        assert "join" in topology
+        assert "not_a_node" not in topology
+        assert len(topology) == 5
+
+    def test_topology__immutable(self):
+        topology = workflows.SplitJoinWorkflow._topology
+        with pytest.raises(AttributeError):
+            topology.nodes = {}
+        with pytest.raises(TypeError):
+            topology.nodes["foo"] = None
+
+    def test_topology__no_edges(self):
+        assert len(Workflow._topology) == 0
+        assert list(Workflow.get_nodes()) == []
+
 
 class TestWorkflow:
     @pytest.fixture()
@@ -122,6 +162,40 @@ class TestWorkflow:
         svg = workflows.SimpleWorkflow.get_graph_svg()
         assert isinstance(svg, SafeString)
 
+    def test_get_graph_svg__cache(self, monkeypatch, settings):
+        pytest.importorskip("graphviz")
+        settings.JOEFLOW_GRAPH_ENGINE = "dot"
+        pipe = mock.Mock(return_value="<svg></svg>")
+        monkeypatch.setattr(NoDashDiGraph, "pipe", pipe)
+        monkeypatch.setattr(workflows.SimpleWorkflow, "rankdir", "LR")
+        assert workflows.SimpleWorkflow.get_graph_svg() == "<svg></svg>"
+        assert workflows.SimpleWorkflow.get_graph_svg() == "<svg></svg>"
+        assert isinstance(workflows.SimpleWorkflow.get_graph_svg(), SafeString)
+        assert pipe.call_count == 1
+
+        monkeypatch.setattr(workflows.SimpleWorkflow, "rankdir", "TD")
+        workflows.SimpleWorkflow.get_graph_svg()
+        assert pipe.call_count == 2
+        workflows.SplitJoinWorkflow.get_graph_svg()
+        assert pipe.call_count == 3
+
+    def test_get_graph_svg__no_cache(self, monkeypatch, settings):
+        pytest.importorskip("graphviz")
+        settings.JOEFLOW_CACHE = None
+        settings.JOEFLOW_GRAPH_ENGINE = "dot"
+        pipe = mock.Mock(return_value="<svg></svg>")
+        monkeypatch.setattr(NoDashDiGraph, "pipe", pipe)
+        workflows.SimpleWorkflow.get_graph_svg()
+        workflows.SimpleWorkflow.get_graph_svg()
+        assert pipe.call_count == 2
+
+    def test_get_graph_svg__python(self, settings):
+        settings.JOEFLOW_GRAPH_ENGINE = "python"
+        svg = workflows.SimpleWorkflow.get_graph_svg()
+        assert isinstance(svg, SafeString)
+        assert svg.startswith("<svg")
+        assert "<title>save the princess</title>" in svg
+
     def test_get_instance_graph(self, db, fixturedir):
         pytest.importorskip("graphviz")
         wf = workflows.SimpleWorkflow.start_method()
@@ -174,12 +248,189 @@ class TestWorkflow:
         assert '\t"start method" -> obsolete [style=dashed]\n' in list(graph)
         assert "\tobsolete -> end [style=dashed]\n" in list(graph)
 
+    def test_get_instance_graph__num_queries(self, db, django_assert_num_queries):
+        pytest.importorskip("graphviz")
+        workflow = workflows.SimpleWorkflow.start_method()
+        parent = workflow.task_set.get(name="save_the_princess")
+        for _ in range(50):
+            task = workflow.task_set.create(name="save_the_princess")
+            task.parent_task_set.add(parent)
+            override = workflow.task_set.create(name="override")
+            override.parent_task_set.add(task)
+            parent = workflow.task_set.create(name="obsolete")
+            parent.parent_task_set.add(override)
+        with django_assert_num_queries(2):
+            graph = workflow.get_instance_graph()
+        assert '\tobsolete -> "save the princess" [style=dashed]\n' in list(graph)
+
+    def test_instance_graph(self, db):
+        wf = workflows.SimpleWorkflow.start_method()
+        graph = wf.instance_graph
+        assert graph.nodes["start_method"].classes == {"completed"}
+        assert graph.nodes["save_the_princess"].classes == {"active"}
+        assert graph.nodes["save_the_princess"].href == (
+            wf.task_set.get(name="save_the_princess").get_absolute_url()
+        )
+        assert graph.nodes["end"].classes == {"inactive"}
+        assert graph.edges["start_method", "save_the_princess"] == "active"
+        assert graph.edges["save_the_princess", "end"] == "inactive"
+
+    def test_instance_graph__memoized(self, db, django_assert_num_queries):
+        pytest.importorskip("graphviz")
+        wf = workflows.SimpleWorkflow.start_method()
+        with django_assert_num_queries(2):
+            wf.get_instance_graph()
+            wf.get_instance_graph_mermaid()
+        wf.task_set.get(name="save_the_princess").finish()
+        wf.refresh_from_db()
+        assert wf.instance_graph.nodes["save_the_princess"].classes == {
+            "completed",
+            "final",
+        }
+
     def test_get_instance_graph_svg(self, db, fixturedir):
         pytest.importorskip("graphviz")
         wf = workflows.SimpleWorkflow.start_method()
         svg = wf.get_instance_graph_svg()
         assert isinstance(svg, SafeString)
 
+    @pytest.mark.usefixtures("shared_cache")
+    def test_get_instance_graph_svg__cache(
+        self, db, monkeypatch, settings, django_capture_on_commit_callbacks
+    ):
+        pytest.importorskip("graphviz")
+        settings.JOEFLOW_GRAPH_ENGINE = "dot"
+        pipe = mock.Mock(return_value="<svg></svg>")
+        monkeypatch.setattr(NoDashDiGraph, "pipe", pipe)
+        with django_capture_on_commit_callbacks(execute=True):
+            wf = workflows.SimpleWorkflow.start_method()
+        assert wf.get_instance_graph_svg() == "<svg></svg>"
+        assert workflows.SimpleWorkflow.objects.get(pk=wf.pk).get_instance_graph_svg()
+        assert pipe.call_count == 1
+        wf.get_instance_graph_svg(output_format="png")
+        assert pipe.call_count == 2
+
+        task = wf.task_set.get(name="save_the_princess")
+        with django_capture_on_commit_callbacks(execute=True):
+            task.finish()
+        wf.get_instance_graph_svg()
+        assert pipe.call_count == 3
+        wf.get_instance_graph_svg()
+        assert pipe.call_count == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            wf.cancel()
+        wf.get_instance_graph_svg()
+        assert pipe.call_count == 4
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_get_instance_graph_svg__uncommitted(
+        self, db, monkeypatch, settings, django_capture_on_commit_callbacks
+    ):
+        pytest.importorskip("graphviz")
+        settings.JOEFLOW_GRAPH_ENGINE = "dot"
+        pipe = mock.Mock(return_value="<svg></svg>")
+        monkeypatch.setattr(NoDashDiGraph, "pipe", pipe)
+        wf = workflows.SimpleWorkflow.start_method()
+        wf.get_instance_graph_svg()
+        with django_capture_on_commit_callbacks() as callbacks:
+            wf.task_set.get(name="save_the_princess").fail()
+            wf.get_instance_graph_svg()
+        assert pipe.call_count == 1
+        for callback in callbacks:
+            callback()
+        wf.get_instance_graph_svg()
+        assert pipe.call_count == 2
+
+    def test_get_instance_graph_svg__python(self, db, settings):
+        settings.JOEFLOW_GRAPH_ENGINE = "python"
+        wf = workflows.SimpleWorkflow.start_method()
+        task = wf.task_set.get(name="save_the_princess")
+        svg = wf.get_instance_graph_svg()
+        assert isinstance(svg, SafeString)
+        assert f'<a href="{task.get_absolute_url()}">' in svg
+
+    def test_get_shared_cache(self, settings, tmp_path):
+        assert joeflow_models.get_cache() is not None
+        assert joeflow_models.get_shared_cache() is None  # local memory
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path),
+            }
+        }
+        assert joeflow_models.get_shared_cache() is not None
+        settings.JOEFLOW_CACHE = None
+        assert joeflow_models.get_shared_cache() is None
+
+    def test_get_graph_engine(self, settings, monkeypatch):
+        settings.JOEFLOW_GRAPH_ENGINE = "python"
+        assert joeflow_models.get_graph_engine() == "python"
+        settings.JOEFLOW_GRAPH_ENGINE = None
+        monkeypatch.setattr(layout, "is_dot_available", lambda: False)
+        assert joeflow_models.get_graph_engine() == "python"
+        monkeypatch.setattr(layout, "is_dot_available", lambda: True)
+        assert joeflow_models.get_graph_engine() == "dot"
+
+    def test_get_task_summary(self, db, django_assert_num_queries):
+        workflow = workflows.LoopWorkflow.objects.create()
+        workflow.task_set.create(name="start", status=Task.SUCCEEDED)
+        for _ in range(3):
+            workflow.task_set.create(
+                name="increment_counter", type=MACHINE, status=Task.SUCCEEDED
+            )
+        failed = workflow.task_set.create(
+            name="increment_counter", type=MACHINE, status=Task.FAILED
+        )
+        with django_assert_num_queries(1):
+            summary = workflow.get_task_summary()
+        assert list(summary) == ["start", "increment_counter"]
+        task_summary = summary["increment_counter"]
+        assert task_summary.type == MACHINE
+        assert task_summary.count == 4
+        assert task_summary.statuses == {Task.SUCCEEDED: 3, Task.FAILED: 1}
+        assert task_summary.first < task_summary.last == failed.created
+
+    def test_instance_graph__aggregated(self, db, settings, django_assert_num_queries):
+        settings.JOEFLOW_INSTANCE_GRAPH_MAX_TASKS = 3
+        workflow = workflows.LoopWorkflow.objects.create()
+        workflow.task_set.create(name="start", status=Task.SUCCEEDED)
+        for _ in range(3):
+            workflow.task_set.create(name="increment_counter", status=Task.SUCCEEDED)
+        workflow.task_set.create(name="is_counter_10")
+        workflow.task_set.create(name="obsolete", status=Task.SUCCEEDED)
+        with django_assert_num_queries(1):
+            graph = workflow.instance_graph
+        assert graph.nodes["increment_counter"] == graph.Node(
+            "increment_counter", MACHINE, {"completed"}, None, 3
+        )
+        assert graph.nodes["is_counter_10"].classes == {"active"}
+        assert graph.nodes["end"].classes == {"inactive"}
+        assert graph.nodes["obsolete"].classes == {"completed", "obsolete"}
+        assert graph.edges["start", "increment_counter"] == "active"
+        assert graph.edges["is_counter_10", "end"] == "inactive"
+        assert "'increment_counter'[increment counter ×3]" in (
+            workflow.get_instance_graph_mermaid()
+        )
+
+    def test_instance_graph__aggregated_final(self, db, settings):
+        settings.JOEFLOW_INSTANCE_GRAPH_MAX_TASKS = 0
+        workflow = workflows.SimpleWorkflow.objects.create()
+        workflow.task_set.create(name="start_method", status=Task.SUCCEEDED)
+        workflow.task_set.create(name="save_the_princess", status=Task.SUCCEEDED)
+        workflow.task_set.create(name="end", status=Task.SUCCEEDED)
+        graph = workflow.instance_graph
+        assert graph.nodes["end"].classes == {"completed", "final"}
+        assert graph.nodes["save_the_princess"].classes == {"completed"}
+
+    def test_instance_graph__below_max_tasks(self, db, settings):
+        settings.JOEFLOW_INSTANCE_GRAPH_MAX_TASKS = 10
+        wf = workflows.SimpleWorkflow.start_method()
+        task = wf.task_set.get(name="save_the_princess")
+        assert wf.instance_graph.nodes["save_the_princess"].href == (
+            task.get_absolute_url()
+        )
+
     def test_get_instance_graph_mermaid(self, db):
         """Test that get_instance_graph_mermaid returns valid Mermaid syntax with task states."""
         wf = workflows.SimpleWorkflow.start_method()
@@ -199,8 +450,10 @@ class TestWorkflow:
         assert "'start_method' --> 'save_the_princess'" in mermaid
 
         # Check it contains styling (for active/completed tasks)
-        assert "style " in mermaid
+        assert "classDef active " in mermaid
+        assert "class 'save_the_princess' active" in mermaid
         assert "linkStyle " in mermaid
+        assert "style '" not in mermaid
 
     def test_get_instance_graph_mermaid_with_override(
         self, db, stub_worker, admin_client
@@ -224,7 +477,7 @@ class TestWorkflow:
         assert "-.->" in mermaid
 
         # Check override styling with dashed border
-        assert f"style '{override_id}'" in mermaid
+        assert f"class '{override_id}' completed_dashed" in mermaid
         assert "stroke-dasharray" in mermaid
 
     def test_get_instance_graph_mermaid_with_obsolete(self, db):
@@ -248,9 +501,162 @@ class TestWorkflow:
         )
 
         # Check obsolete task styling with dashed border
-        assert "style 'obsolete'" in mermaid
+        assert "class 'obsolete' active_dashed" in mermaid
         assert "stroke-dasharray" in mermaid
 
+    def test_get_instance_graph_mermaid__grouped(self, db):
+        workflow = workflows.SplitJoinWorkflow.objects.create()
+        workflow.task_set.create(name="start", status=Task.SUCCEEDED)
+        mermaid = workflow.get_instance_graph_mermaid()
+        assert mermaid.count("classDef ") == 2
+        assert "class 'split','batman','robin','join' inactive" in mermaid
+        assert "linkStyle 0,1,2,3,4 stroke:#999" in mermaid
+
+    def test_get_instance_graph_mermaid__loop(self, db):
+        workflow = workflows.LoopWorkflow.objects.create()
+        for _ in range(3):
+            workflow.task_set.create(name="increment_counter", status=Task.SUCCEEDED)
+        latest = workflow.task_set.create(name="increment_counter")
+        workflow.task_set.create(name="obsolete", status=Task.SUCCEEDED)
+        workflow.task_set.create(name="obsolete", status=Task.SUCCEEDED)
+        graph = workflow.instance_graph
+        assert graph.nodes["increment_counter"].iterations == 4
+        assert graph.nodes["increment_counter"].classes == {"active"}
+        assert graph.nodes["obsolete"].iterations == 2
+        assert graph.nodes["end"].iterations == 0
+        mermaid = workflow.get_instance_graph_mermaid()
+        assert "'increment_counter'[increment counter ×4]" in mermaid
+        assert "'obsolete'[obsolete ×2]" in mermaid
+        assert mermaid.count("'increment_counter'[") == 1
+        assert graph.nodes["increment_counter"].href == latest.get_absolute_url()
+
+    def test_instance_graph__concurrent_task(self, db):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        start = workflow.task_set.create(name="start_method")
+        start.finish()
+        Through = Task.parent_task_set.through
+        filter_links = Through.objects.filter
+
+        def create_task_and_filter(*args, **kwargs):
+            # a worker commits a new task between the two queries
+            workflow.task_set.create(name="save_the_princess").parent_task_set.add(
+                start
+            )
+            return filter_links(*args, **kwargs)
+
+        with mock.patch.object(
+            Through.objects, "filter", side_effect=create_task_and_filter
+        ):
+            graph = workflow.instance_graph
+        assert graph.nodes["start_method"].classes == {"completed", "final"}
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_get_instance_graph_mermaid__cache(
+        self, db, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            wf = workflows.SimpleWorkflow.start_method()
+        mermaid = wf.get_instance_graph_mermaid()
+        wf = workflows.SimpleWorkflow.objects.get(pk=wf.pk)
+        assert wf.get_instance_graph_mermaid() == mermaid
+        assert "instance_graph" not in wf.__dict__
+
+        with django_capture_on_commit_callbacks(execute=True):
+            wf.task_set.get(name="save_the_princess").finish()
+        assert wf.get_instance_graph_mermaid() != mermaid
+
+    def test_task_counters(self, db, settings):
+        settings.JOEFLOW_WORKFLOW_COUNTERS = True
+
+        def counters():
+            workflow = Workflow.objects.get(pk=wf.pk)
+            return (
+                workflow.open_task_count,
+                workflow.failed_task_count,
+                workflow.finished,
+            )
+
+        wf = workflows.SimpleWorkflow.start_method()
+        assert counters() == (1, 0, False)
+        task = wf.task_set.get(name="save_the_princess")
+        task.fail()
+        assert counters() == (0, 1, False)
+        task.enqueue()
+        assert counters() == (1, 0, False)
+        wf.save()  # does not override the counters
+        assert counters() == (1, 0, False)
+        task.workflow = wf
+        task.finish()
+        task.start_next_tasks()
+        assert counters() == (1, 0, False)
+        wf.task_set.get(name="end").finish()
+        assert counters() == (0, 0, True)
+        assert Workflow.objects.get(pk=wf.pk).last_activity
+
+    def test_save__counters_disabled(self, db):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=workflows.SimpleWorkflow)
+        try:
+            workflow.save()
+        finally:
+            post_save.disconnect(receiver, sender=workflows.SimpleWorkflow)
+        assert receiver.call_args.kwargs["update_fields"] is None
+
+    def test_save__deferred(self, db, settings, django_assert_num_queries):
+        settings.JOEFLOW_WORKFLOW_COUNTERS = True
+        workflow = workflows.SimpleWorkflow.objects.create()
+        workflow = Workflow.objects.only("pk", "modified").get(pk=workflow.pk)
+        with django_assert_num_queries(1):
+            workflow.save()
+
+    def test_task_counters__cancel(self, db, settings):
+        settings.JOEFLOW_WORKFLOW_COUNTERS = True
+        workflow = workflows.SimpleWorkflow.objects.create()
+        workflow.task_set.create()
+        workflow.task_set.create(status=Task.FAILED)
+        workflow.task_set.create(status=Task.SUCCEEDED)
+        workflow.refresh_from_db()
+        assert workflow.open_task_count == 1
+        assert workflow.failed_task_count == 1
+        workflow.cancel()
+        workflow.refresh_from_db()
+        assert workflow.open_task_count == 0
+        assert workflow.failed_task_count == 0
+        assert workflow.finished
+
+    def test_task_counters__disabled(self, db):
+        wf = workflows.SimpleWorkflow.start_method()
+        wf.refresh_from_db()
+        assert wf.open_task_count == 0
+        assert wf.last_activity is None
+
+    def test_update_task_counters(self, db, settings):
+        running = workflows.SimpleWorkflow.start_method()
+        finished = workflows.SimpleWorkflow.objects.create()
+        finished.task_set.create(status=Task.SUCCEEDED)
+        failed = workflows.SimpleWorkflow.objects.create()
+        failed.task_set.create(status=Task.FAILED)
+        empty = workflows.SimpleWorkflow.objects.create()
+        other = workflows.LoopWorkflow.objects.create()
+        other.task_set.create()
+
+        assert workflows.SimpleWorkflow.update_task_counters() == 4
+        for wf in (running, finished, failed, empty, other):
+            wf.refresh_from_db()
+        assert (running.open_task_count, running.finished) == (1, False)
+        assert running.last_activity
+        assert (finished.open_task_count, finished.finished) == (0, True)
+        assert (failed.failed_task_count, failed.finished) == (1, False)
+        assert (empty.open_task_count, empty.finished) == (0, False)
+        assert empty.last_activity is None
+        assert other.open_task_count == 0
+
+        settings.JOEFLOW_WORKFLOW_COUNTERS = True
+        running.task_set.get(name="save_the_princess").cancel()
+        running.refresh_from_db()
+        assert (running.open_task_count, running.finished) == (0, True)
+
     def test_cancel(self, db):
         workflow = workflows.SimpleWorkflow.objects.create()
         workflow.task_set.create()
@@ -260,6 +666,39 @@ class TestWorkflow:
         assert workflow.task_set.latest().completed_by_user is None
         assert workflow.task_set.latest().completed
 
+    @pytest.mark.usefixtures("shared_cache")
+    def test_cancel_all(self, db, django_capture_on_commit_callbacks):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create()
+        other = workflows.SimpleWorkflow.objects.create().task_set.create()
+        gateway = workflows.GatewayWorkflow.objects.create().task_set.create()
+        succeeded = workflow.task_set.create(status=Task.SUCCEEDED)
+        succeeded.finish()
+        with django_capture_on_commit_callbacks(execute=True):
+            assert workflows.SimpleWorkflow.cancel_all() == 2
+        completed = succeeded.completed
+        succeeded.refresh_from_db()
+        assert succeeded.status == Task.SUCCEEDED
+        assert succeeded.completed == completed
+        assert not Task.objects.filter(pk__in=[task.pk, other.pk]).scheduled().exists()
+        assert Task.is_canceled(task.pk)
+        assert not Task.is_canceled(gateway.pk)
+        gateway.refresh_from_db()
+        assert gateway.status == Task.SCHEDULED
+
+    def test_cancel_all__queryset(self, db):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        workflow.task_set.create()
+        other = workflows.SimpleWorkflow.objects.create().task_set.create()
+        assert (
+            workflows.SimpleWorkflow.cancel_all(
+                workflows.SimpleWorkflow.objects.filter(pk=workflow.pk)
+            )
+            == 1
+        )
+        other.refresh_from_db()
+        assert other.status == Task.SCHEDULED
+
     def test_cancel__with_user(self, db):
         workflow = workflows.SimpleWorkflow.objects.create()
         workflow.task_set.create()
@@ -340,6 +779,89 @@ class TestWorkflow:
 
 
 class TestTaskQuerySet:
+    def test_with_workflows(self, db, admin_user, django_assert_num_queries):
+        welcome = models.WelcomeWorkflow.objects.create(user=admin_user)
+        simple = workflows.SimpleWorkflow.objects.create()
+        proxy = workflows.AssigneeWorkflow.objects.create()
+        for workflow in (welcome, simple, proxy):
+            for _ in range(10):
+                workflow.task_set.create(name="start")
+        ContentType.objects.get_for_models(
+            models.WelcomeWorkflow,
+            workflows.SimpleWorkflow,
+            workflows.AssigneeWorkflow,
+            for_concrete_models=False,
+        )
+
+        with django_assert_num_queries(4):
+            tasks = list(Task.objects.with_workflows().order_by("pk"))
+            assert [task.workflow for task in tasks[::10]] == [welcome, simple, proxy]
+            assert type(tasks[-1].workflow) is workflows.AssigneeWorkflow
+            assert tasks[0].workflow.user_id == admin_user.pk
+            assert tasks[0].node is models.WelcomeWorkflow.start
+
+        with django_assert_num_queries(4):
+            assert {
+                task.workflow.pk
+                for task in Task.objects.with_workflows().iterator(chunk_size=5)
+            } == {welcome.pk, simple.pk, proxy.pk}
+
+    def test_with_workflows__chunks(self, db, django_assert_num_queries, monkeypatch):
+        monkeypatch.setattr(joeflow_models.PrefetchWorkflowIterable, "batch_size", 2)
+        workflow = workflows.SimpleWorkflow.objects.create()
+        for _ in range(3):
+            workflow.task_set.create()
+        ContentType.objects.get_for_model(workflow, for_concrete_model=False)
+        with django_assert_num_queries(3):
+            tasks = list(Task.objects.with_workflows())
+            assert {task.workflow for task in tasks} == {workflow}
+
+    def test_inbox(self, db, admin_user, django_assert_num_queries):
+        simple = workflows.SimpleWorkflow.objects.create()
+        proxy = workflows.AssigneeWorkflow.objects.create()
+        welcome = models.WelcomeWorkflow.objects.create(user=admin_user)
+        tasks = []
+        for workflow in (simple, proxy, welcome):
+            task = workflow.task_set.create(name="save_the_princess", type=HUMAN)
+            task.assignees.add(admin_user)
+            tasks.append(task)
+        workflow.task_set.create(name="other", type=HUMAN)
+        workflow.task_set.create(name="machine", type=MACHINE).assignees.add(admin_user)
+        simple.task_set.create(
+            name="done", type=HUMAN, status=Task.SUCCEEDED, completed=timezone.now()
+        ).assignees.add(admin_user)
+
+        with django_assert_num_queries(4):  # tasks and one query per class
+            inbox = list(Task.objects.inbox(admin_user))
+            assert [type(task.workflow) for task in inbox] == [
+                models.WelcomeWorkflow,
+                workflows.AssigneeWorkflow,
+                workflows.SimpleWorkflow,
+            ]
+            assert [task.workflow.pk for task in inbox] == [
+                welcome.pk,
+                proxy.pk,
+                simple.pk,
+            ]
+        with django_assert_num_queries(0):
+            assert inbox[0].workflow.created == welcome.created
+            assert inbox[0].workflow.user_id == admin_user.pk
+        assert inbox == tasks[::-1]
+
+    def test_inbox__after(self, db, admin_user):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        tasks = []
+        for _ in range(5):
+            task = workflow.task_set.create(type=HUMAN)
+            task.assignees.add(admin_user)
+            tasks.append(task)
+        workflow.task_set.update(created=timezone.now())  # same creation time
+        first_page = list(Task.objects.inbox(admin_user)[:2])
+        assert first_page == tasks[:-3:-1]
+        second_page = list(Task.objects.inbox(admin_user, after=first_page[-1].pk)[:2])
+        assert second_page == tasks[-3:-5:-1]
+        assert list(Task.objects.inbox(admin_user, after=tasks[0].pk)) == []
+
     def test_scheduled(self, db):
         workflow = models.SimpleWorkflowState.objects.create()
         task = workflow.task_set.create()
@@ -370,6 +892,32 @@ class TestTaskQuerySet:
         workflow.task_set.create()
         assert workflow.task_set.canceled().get() == task
 
+    def test_cancel__no_shared_cache(
+        self, db, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        workflow.task_set.create()
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            # savepoint, update and release, no markers are written
+            with django_assert_num_queries(3):
+                assert workflow.task_set.cancel() == 1
+        assert not callbacks
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_cancel__chunks(self, db, monkeypatch, django_capture_on_commit_callbacks):
+        monkeypatch.setattr(joeflow_models, "CACHE_BATCH_SIZE", 2)
+        tasks = [
+            workflows.SimpleWorkflow.objects.create().task_set.create()
+            for _ in range(3)
+        ]
+        cache = joeflow_models.get_shared_cache()
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            with django_capture_on_commit_callbacks(execute=True):
+                assert Task.objects.all().cancel() == 3
+        # two batches of cancel markers and graph versions each
+        assert set_many.call_count == 4
+        assert all(Task.is_canceled(task.pk) for task in tasks)
+
     def test_cancel__with_user(self, db):
         workflow = models.SimpleWorkflowState.objects.create()
         workflow.task_set.create()
@@ -389,6 +937,82 @@ class TestTaskQuerySet:
         workflow.task_set.cancel(user=user)
         assert workflow.task_set.latest().completed_by_user is None
 
+    def test_enqueue(self, db, settings, django_capture_on_commit_callbacks):
+        settings.JOEFLOW_WORKFLOW_COUNTERS = True
+        workflow = workflows.SimpleWorkflow.objects.create()
+        failed = workflow.task_set.create(status=Task.FAILED, exception="Boom!")
+        canceled = workflow.task_set.create(status=Task.CANCELED)
+        workflow.task_set.create(status=Task.SUCCEEDED)
+        task_runner_many = mock.Mock()
+        with mock.patch.object(
+            joeflow_models,
+            "_get_task_runner",
+            return_value=(mock.Mock(), task_runner_many),
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                assert (
+                    workflow.task_set.not_succeeded().enqueue(countdown=3, batch_size=1)
+                    == 2
+                )
+        assert task_runner_many.call_count == 2
+        assert [
+            (task.pk, task._workflow_id)
+            for call in task_runner_many.call_args_list
+            for task in call.args[0]
+        ] == [(failed.pk, workflow.pk), (canceled.pk, workflow.pk)]
+        assert task_runner_many.call_args.kwargs == {"countdown": 3, "eta": None}
+        failed.refresh_from_db()
+        assert failed.status == Task.SCHEDULED
+        assert failed.exception == ""
+        assert failed.completed is None
+        workflow.refresh_from_db()
+        assert workflow.open_task_count == 2
+        assert workflow.failed_task_count == 0
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_enqueue__num_queries(
+        self,
+        db,
+        settings,
+        django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        settings.JOEFLOW_WORKFLOW_COUNTERS = True
+        workflow_list = [workflows.SimpleWorkflow.objects.create() for _ in range(5)]
+        Task.objects.bulk_create(
+            [
+                Task(workflow=workflow, status=Task.FAILED)
+                for workflow in workflow_list
+                for _ in range(2)
+            ]
+        )
+        with mock.patch.object(
+            joeflow_models, "_get_task_runner", return_value=(mock.Mock(), None)
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                # savepoint, lock, counters, reset and release
+                with django_assert_num_queries(5):
+                    assert Task.objects.enqueue() == 10
+        assert not Task.objects.exclude(status=Task.SCHEDULED).exists()
+        for workflow in workflow_list:
+            workflow.refresh_from_db()
+            assert workflow.open_task_count == 2
+            assert workflow.failed_task_count == 0
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_enqueue__stale_content_type(self, db, django_capture_on_commit_callbacks):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        content_type = ContentType.objects.create(app_label="testapp", model="gone")
+        task = Task.objects.create(
+            _workflow=workflow, content_type=content_type, status=Task.FAILED
+        )
+        with mock.patch.object(
+            joeflow_models, "_get_task_runner", return_value=(mock.Mock(), None)
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                assert Task.objects.filter(pk=task.pk).enqueue() == 1
+                assert Task.objects.filter(pk=task.pk).cancel() == 1
+
 
 class TestTask:
     def test_start_next_tasks__default(self, db):
@@ -420,6 +1044,41 @@ class TestTask:
         )
         assert len(tasks) == 2
 
+    def test_start_next_tasks__bulk(
+        self,
+        db,
+        settings,
+        django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        settings.JOEFLOW_CACHE = None  # only capture task runner callbacks
+        workflow = workflows.SplitJoinWorkflow.objects.create()
+        task = workflow.task_set.create(name="split")
+        task.workflow = workflow
+        with django_capture_on_commit_callbacks() as callbacks:
+            with django_assert_num_queries(2):
+                tasks = task.start_next_tasks(
+                    next_nodes=[
+                        workflows.SplitJoinWorkflow.batman,
+                        workflows.SplitJoinWorkflow.robin,
+                    ]
+                )
+        assert [t.name for t in tasks] == ["batman", "robin"]
+        assert all(t.pk for t in tasks)
+        assert set(task.child_task_set.all()) == set(tasks)
+        assert len(callbacks) == 1
+
+    def test_start_next_tasks__no_machine_tasks(
+        self, db, settings, django_capture_on_commit_callbacks
+    ):
+        settings.JOEFLOW_CACHE = None  # only capture task runner callbacks
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create(name="start_method")
+        with django_capture_on_commit_callbacks() as callbacks:
+            tasks = task.start_next_tasks()
+        assert [t.name for t in tasks] == ["save_the_princess"]
+        assert not callbacks
+
     def test_start_next_tasks__custom_task_creation(self, db):
         workflow = workflows.SplitJoinWorkflow.objects.create()
         task = workflow.task_set.create(name="batman")
@@ -430,6 +1089,75 @@ class TestTask:
         tasks = task.start_next_tasks(next_nodes=[workflows.SplitJoinWorkflow.join])
         assert tasks[0] == join1
 
+    def test_enqueue(self, db, settings, django_capture_on_commit_callbacks):
+        pytest.importorskip("celery")
+        settings.JOEFLOW_TASK_RUNNER = "joeflow.runner.celery.task_runner"
+        joeflow_models._get_task_runner.cache_clear()
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create(status=Task.FAILED, exception="Boom!")
+        with mock.patch("joeflow.runner.celery.task_runner_many") as task_runner_many:
+            with django_capture_on_commit_callbacks(execute=True):
+                task.enqueue(countdown=3)
+        joeflow_models._get_task_runner.cache_clear()
+        task_runner_many.assert_called_once_with([task], countdown=3, eta=None)
+        task.refresh_from_db()
+        assert task.status == Task.SCHEDULED
+        assert task.exception == ""
+
+    def test_enqueue__task_runner(self, db, django_capture_on_commit_callbacks):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create()
+        task_runner = mock.Mock()
+        with mock.patch.object(
+            joeflow_models, "_get_task_runner", return_value=(task_runner, None)
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                task.enqueue()
+        task_runner.assert_called_once_with(
+            task_pk=task.pk, workflow_pk=workflow.pk, countdown=None, eta=None
+        )
+
+    def test_get_task_runner(self):
+        pytest.importorskip("celery")
+        from joeflow.runner import celery, sync
+
+        joeflow_models._get_task_runner.cache_clear()
+        assert joeflow_models._get_task_runner("joeflow.runner.celery.task_runner") == (
+            celery.task_runner,
+            celery.task_runner_many,
+        )
+        # the counterpart must match the runner's name
+        assert joeflow_models._get_task_runner(
+            "joeflow.runner.celery._celery_task_runner"
+        ) == (celery._celery_task_runner, None)
+        assert joeflow_models._get_task_runner("joeflow.runner.sync.task_runner") == (
+            sync.task_runner,
+            None,
+        )
+        assert joeflow_models._get_task_runner.cache_info().misses == 3
+
+    @pytest.mark.usefixtures("shared_cache")
+    def test_is_canceled(self, db, django_capture_on_commit_callbacks):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create()
+        assert not Task.is_canceled(task.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            task.cancel()
+        assert Task.is_canceled(task.pk)
+        with mock.patch.object(
+            joeflow_models, "_get_task_runner", return_value=(mock.Mock(), None)
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                task.enqueue()
+        assert not Task.is_canceled(task.pk)
+
+    def test_is_canceled__no_cache(self, db, settings):
+        settings.JOEFLOW_CACHE = None
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create()
+        task.cancel()
+        assert not Task.is_canceled(task.pk)
+
     def test_fail(self, db):
         workflow = workflows.SimpleWorkflow.objects.create()
         task = workflow.task_set.create()
@@ -443,6 +1171,53 @@ class TestTask:
         assert "Traceback (most recent call last):\n" in task.stacktrace
         assert '    raise OSError("nope")\n' in task.stacktrace
         assert "OSError: nope\n" in task.stacktrace
+        assert len(task.stacktrace_fingerprint) == 64
+        assert task.get_stacktrace() == task.stacktrace
+
+    def test_fail__max_frames(self, db, settings):
+        settings.JOEFLOW_STACKTRACE_MAX_FRAMES = 2
+        workflow = workflows.SimpleWorkflow.objects.create()
+        task = workflow.task_set.create()
+
+        def recurse(depth):
+            if depth:
+                recurse(depth - 1)
+            raise OSError("nope")
+
+        try:
+            recurse(10)
+        except OSError:
+            task.fail()
+
+        assert task.stacktrace.count('  File "') == 2
+        assert '    raise OSError("nope")\n' in task.stacktrace
+
+    def test_fail__shared(self, db, settings):
+        settings.JOEFLOW_STACKTRACE_SHARED = True
+        settings.JOEFLOW_STACKTRACE_COMPRESS = True
+        workflow = workflows.SimpleWorkflow.objects.create()
+        tasks = [workflow.task_set.create(), workflow.task_set.create()]
+        for task in tasks:
+            try:
+                raise OSError("nope")
+            except OSError:
+                task.fail()
+
+        (stacktrace,) = Stacktrace.objects.all()
+        assert stacktrace.compressed
+        for task in Task.objects.filter(pk__in=[t.pk for t in tasks]):
+            assert task.stacktrace == ""
+            assert task.stacktrace_fingerprint == stacktrace.fingerprint
+            assert task.exception == "OSError: nope"
+            assert '    raise OSError("nope")\n' in task.get_stacktrace()
+
+        with mock.patch.object(
+            joeflow_models, "_get_task_runner", return_value=(mock.Mock(), None)
+        ):
+            tasks[0].enqueue()
+        tasks[0].refresh_from_db()
+        assert tasks[0].stacktrace_fingerprint == ""
+        assert tasks[0].get_stacktrace() == ""
 
     def test_cancel(self, db):
         workflow = workflows.SimpleWorkflow.objects.create()
@@ -0,0 +1,129 @@
+from unittest import mock
+
+import pytest
+from joeflow.models import Task
+from joeflow.runner import locking, sync
+
+from tests.testapp import workflows
+
+fallback_task_runner = mock.Mock()
+
+
+@pytest.fixture()
+def sync_runner(settings):
+    settings.JOEFLOW_TASK_RUNNER = "joeflow.runner.sync.task_runner"
+    settings.JOEFLOW_SYNC_FALLBACK_TASK_RUNNER = "tests.test_sync.fallback_task_runner"
+    fallback_task_runner.reset_mock()
+    yield fallback_task_runner
+
+
+def test_task_runner(transactional_db, sync_runner):
+    wf = workflows.SplitJoinWorkflow.objects.create()
+    task = wf.task_set.create(name="start")
+    task.start_next_tasks()
+    task.finish()
+    wf.refresh_from_db()
+    assert wf.parallel_task_value == 2
+    assert wf.task_set.get(name="join").status == Task.SUCCEEDED
+    assert not sync_runner.called
+
+
+def test_task_runner__max_depth(transactional_db, sync_runner, settings):
+    settings.JOEFLOW_SYNC_MAX_DEPTH = 5
+    wf = workflows.LoopWorkflow.objects.create()
+    task = wf.task_set.create(name="start")
+    task.start_next_tasks()
+    task.finish()
+    wf.refresh_from_db()
+    assert wf.counter == 3
+    deferred = wf.task_set.scheduled().get()
+    sync_runner.assert_called_once_with(
+        task_pk=deferred.pk, workflow_pk=wf.pk, countdown=None, eta=None
+    )
+
+
+def test_task_runner__eta(transactional_db, sync_runner):
+    wf = workflows.WaitWorkflow.start()
+    task = wf.task_set.get(name="wait")
+    assert task.status == Task.SCHEDULED
+    sync_runner.assert_called_once_with(
+        task_pk=task.pk,
+        workflow_pk=wf.pk,
+        countdown=None,
+        eta=workflows.WaitWorkflow.wait.get_eta(task),
+    )
+
+
+def test_task_runner__false(transactional_db, sync_runner):
+    wf = workflows.WaitWorkflow.objects.create()
+    task = wf.task_set.create(name="wait")
+    task.enqueue()
+    task.refresh_from_db()
+    assert task.status == Task.SCHEDULED
+    sync_runner.assert_called_once_with(
+        task_pk=task.pk, workflow_pk=wf.pk, countdown=None, eta=None
+    )
+
+
+def test_task_runner__fail(transactional_db, sync_runner):
+    wf = workflows.FailingWorkflow.start()
+    task = wf.task_set.get(name="fail")
+    assert task.status == Task.FAILED
+    assert task.exception == "ValueError: Boom!"
+    assert not sync_runner.called
+
+
+def test_task_runner__error(transactional_db, sync_runner):
+    wf = workflows.SplitJoinWorkflow.objects.create()
+    task = wf.task_set.create(name="start")
+    start_next_tasks = Task.start_next_tasks
+
+    def side_effect(self, next_nodes=None):
+        if self.name == "batman":
+            raise ValueError("Boom!")
+        return start_next_tasks(self, next_nodes)
+
+    with mock.patch.object(
+        Task, "start_next_tasks", autospec=True, side_effect=side_effect
+    ):
+        task.start_next_tasks()
+        task.finish()
+    batman = wf.task_set.get(name="batman")
+    assert batman.status == Task.FAILED
+    assert batman.exception == "ValueError: Boom!"
+    assert wf.task_set.get(name="split").status == Task.SUCCEEDED
+    assert wf.task_set.get(name="robin").status == Task.SUCCEEDED
+
+
+def test_task_runner__no_fallback(transactional_db, sync_runner, settings, caplog):
+    settings.JOEFLOW_SYNC_FALLBACK_TASK_RUNNER = None
+    wf = workflows.WaitWorkflow.start()
+    task = wf.task_set.get(name="wait")
+    assert task.status == Task.SCHEDULED
+    assert f"Task {task.pk!r} was not executed and remains scheduled" in caplog.text
+
+
+def test_task_runner__locked(transactional_db, sync_runner, settings):
+    settings.JOEFLOW_LOCK_STRATEGY = "skip_locked"
+    settings.JOEFLOW_LOCK_RETRY_DELAY = 2
+    wf = workflows.SimpleWorkflow.objects.create()
+    task = wf.task_set.create(name="end")
+    with mock.patch.object(locking, "_lock", return_value=None):
+        task.enqueue()
+    task.refresh_from_db()
+    assert task.status == Task.SCHEDULED
+    sync_runner.assert_called_once_with(
+        task_pk=task.pk, workflow_pk=wf.pk, countdown=2, eta=None
+    )
+
+
+@pytest.mark.usefixtures("shared_cache")
+def test_execute__canceled(transactional_db, sync_runner, django_assert_num_queries):
+    wf = workflows.SimpleWorkflow.objects.create()
+    task = wf.task_set.create(name="end")
+    task.cancel()
+    with django_assert_num_queries(0):
+        sync._execute(task.pk, wf.pk)
+    task.enqueue()
+    task.refresh_from_db()
+    assert task.status == Task.SUCCEEDED
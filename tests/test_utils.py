@@ -74,3 +74,30 @@ class TestNoDashDiGraph:
 
     def test_quote_edge(self):
         assert NoDashDiGraph._quote_edge("foo_bar") == '"foo bar"'
+
+    def test_iter__repeated(self):
+        graph = NoDashDiGraph()
+        graph.node("foo", label="Foo", _attributes={"color": "red"})
+        graph.edge("foo", "bar", label="Bar")
+        source = graph.source
+        assert "\tfoo [label=Foo color=red]\n" in source
+        assert "\tfoo -> bar [label=Bar]\n" in source
+        assert graph.source == source
+
+    def test_iter__memoized(self):
+        graph = NoDashDiGraph()
+        graph.node("foo")
+        list(graph)
+        lines = graph._lines
+        list(graph)
+        assert graph._lines is lines
+        graph.edge("foo", "bar")
+        assert graph._lines is None
+        assert list(graph)[-2] == "\tfoo -> bar\n"
+
+    def test_clear(self):
+        graph = NoDashDiGraph()
+        graph.node("foo")
+        graph.edge("foo", "bar")
+        graph.clear()
+        assert list(graph) == ["digraph {\n", "}\n"]
@@ -1,4 +1,6 @@
 from django.urls import reverse
+from joeflow.models import Task
+from joeflow.typing import HUMAN
 
 from .testapp import models, workflows
 
@@ -43,3 +45,33 @@ class TestTaskViewMixin:
 
         new_task = wf.task_set.get(name="save_the_princess")
         assert admin_user in new_task.assignees.all()
+
+
+class TestInboxView:
+    def test_get(self, db, admin_client, admin_user):
+        workflow = workflows.SimpleWorkflow.objects.create()
+        for _ in range(21):
+            workflow.task_set.create(
+                name="save_the_princess", type=HUMAN
+            ).assignees.add(admin_user)
+        response = admin_client.get(reverse("inbox"))
+        assert response.status_code == 200
+        tasks = response.context_data["object_list"]
+        assert len(tasks) == 20
+        assert response.context_data["next_after"] == tasks[-1].pk
+        assert workflow.get_absolute_url() in response.content.decode()
+
+        response = admin_client.get(reverse("inbox"), {"after": tasks[-1].pk})
+        assert response.status_code == 200
+        assert response.context_data["object_list"] == [
+            Task.objects.order_by("pk").first()
+        ]
+        assert response.context_data["next_after"] is None
+
+    def test_get__invalid_page(self, db, admin_client):
+        response = admin_client.get(reverse("inbox"), {"after": "x"})
+        assert response.status_code == 400
+
+    def test_get__anonymous(self, db, client):
+        response = client.get(reverse("inbox"))
+        assert response.status_code == 302
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("testapp", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AssigneeWorkflow",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("testapp.simpleworkflowstate",),
+        ),
+    ]
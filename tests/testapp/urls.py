@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.urls import include, path
+from joeflow.views import InboxView
 
 from . import models, workflows
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("inbox/", InboxView.as_view(), name="inbox"),
     path("shipment/", include(workflows.ShippingWorkflow.urls())),
     path("simple/", include(workflows.SimpleWorkflow.urls())),
     path("assignee/", include(workflows.AssigneeWorkflow.urls())),